@@ -4,10 +4,9 @@ from PySide6.QtCore import Qt, QTimer, QStringListModel, QRect, QRegularExpressi
 import json
 import os
 import sys
-from PySide6.QtCore import QThreadPool # Import QThreadPool
 
 # Import worker threads
-from worker_threads import JediCompletionWorker, PyflakesLinterWorker, WorkerSignals
+from worker_threads import JediCompletionWorker, PyflakesLinterWorker, RequestCounter, WorkerSignals, LANGUAGE_POOL
 
 from python_highlighter import PythonHighlighter # Import the dedicated highlighter
 
@@ -180,7 +179,10 @@ class _InternalCodeEditor(QPlainTextEdit): # Renamed and inherits QPlainTextEdit
         self._apply_editor_theme()
 
         self.highlighter = PythonHighlighter(self.document(), self.theme_config)
-        self.thread_pool = QThreadPool.globalInstance()
+        self.thread_pool = LANGUAGE_POOL # Shared, size-limited pool for language workers
+        # This editor's own request numbering; only its newest request is shown
+        self._completion_requests = RequestCounter()
+        self._lint_requests = RequestCounter()
         self.setup_linter()
         self.setup_completer()
 
@@ -307,15 +309,17 @@ class _InternalCodeEditor(QPlainTextEdit): # Renamed and inherits QPlainTextEdit
         column = self.textCursor().columnNumber()
         file_path = self.file_path if self.file_path else "untitled.py"
 
-        worker = JediCompletionWorker(text, line, column, file_path)
+        worker = JediCompletionWorker(text, line, column, file_path, self._completion_requests)
         worker.signals.result.connect(self._handle_completions_result)
         worker.signals.error.connect(lambda msg: sys.stderr.write(f"Jedi error: {msg}\n"))
         self.thread_pool.start(worker)
         print("LOG: CodeEditor.request_completions - Exit")
 
-    @Slot(list)
-    def _handle_completions_result(self, words):
+    @Slot(int, object)
+    def _handle_completions_result(self, generation, words):
         print("LOG: CodeEditor._handle_completions_result - Entry")
+        if generation != self._completion_requests.latest: # Superseded by a newer request from this editor
+            return
         self.completer.model().setStringList(words)
 
         if words:
@@ -359,12 +363,17 @@ class _InternalCodeEditor(QPlainTextEdit): # Renamed and inherits QPlainTextEdit
         print("LOG: CodeEditor.lint_code - Entry")
         code = self.toPlainText()
         file_path = self.file_path if self.file_path else "untitled.py"
-        worker = PyflakesLinterWorker(code)
-        worker.signals.result.connect(self.apply_linting_highlights)
+        worker = PyflakesLinterWorker(code, self._lint_requests)
+        worker.signals.result.connect(self._handle_lint_result)
         worker.signals.error.connect(lambda msg: sys.stderr.write(f"Pyflakes error: {msg}\n"))
         self.thread_pool.start(worker)
         print("LOG: CodeEditor.lint_code - Exit")
 
+    @Slot(int, object)
+    def _handle_lint_result(self, generation, errors):
+        if generation == self._lint_requests.latest: # Otherwise superseded by a newer lint of this editor
+            self.apply_linting_highlights(errors)
+
     def apply_linting_highlights(self, errors):
         print("LOG: CodeEditor.apply_linting_highlights - Entry")
         self._is_programmatic_change = True # Set flag before programmatic change
@@ -609,6 +618,34 @@ class CodeEditor(QWidget): # Now inherits QWidget
     def setPlainText(self, text):
         self.text_edit.setPlainText(text)
 
+    def set_plain_text_bulk(self, text):
+        """
+        Replaces the whole document with the highlighter detached, so the bulk
+        replace is not tokenized block by block on the GUI thread.
+        Re-attaching the highlighter schedules a single deferred rehighlight.
+        """
+        highlighter = self.text_edit.highlighter
+        highlighter.setDocument(None)
+        try:
+            self.text_edit.setPlainText(text)
+        finally:
+            highlighter.setDocument(self.text_edit.document())
+
+    def apply_text_edits(self, edits):
+        """
+        Applies (start, end, replacement) edits, as produced by the Black worker,
+        as a single undo step. Only the affected blocks are re-laid out and rehighlighted.
+        """
+        cursor = QTextCursor(self.text_edit.document())
+        cursor.beginEditBlock()
+        try:
+            for start, end, replacement in reversed(edits): # Last first, so earlier offsets stay valid
+                cursor.setPosition(start)
+                cursor.setPosition(end, QTextCursor.KeepAnchor)
+                cursor.insertText(replacement)
+        finally:
+            cursor.endEditBlock()
+
     def document(self): # MainWindow uses this for undo/redo
         return self.text_edit.document()
 
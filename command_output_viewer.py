@@ -1,10 +1,13 @@
 from PySide6.QtWidgets import QWidget, QVBoxLayout, QPlainTextEdit, QPushButton
-from PySide6.QtCore import QProcess, Signal, Slot, Qt
-from PySide6.QtGui import QTextCharFormat, QColor
+from PySide6.QtCore import QProcess, Slot
+from PySide6.QtGui import QTextCharFormat, QColor, QTextCursor
 import sys
-import os
 
 class CommandOutputViewer(QWidget):
+    # Shared color -> QTextCharFormat cache; only a handful of colors are ever used
+    _FMT_CACHE: dict[str, QTextCharFormat] = {}
+    MAX_OUTPUT_BLOCKS = 10_000
+
     def __init__(self, parent=None):
         super().__init__(parent)
         self.process = None
@@ -15,6 +18,11 @@ class CommandOutputViewer(QWidget):
         
         self.output_display = QPlainTextEdit(self)
         self.output_display.setReadOnly(True)
+        # Bounded console: Qt drops the oldest blocks past the cap, and a read-only
+        # log needs neither an undo stack nor re-wrapping on every resize.
+        self.output_display.setMaximumBlockCount(self.MAX_OUTPUT_BLOCKS)
+        self.output_display.document().setUndoRedoEnabled(False)
+        self.output_display.setLineWrapMode(QPlainTextEdit.NoWrap)
         self.output_display.setStyleSheet("background-color: black; color: white; font-family: 'Consolas', 'Monospace';")
         self.layout.addWidget(self.output_display)
 
@@ -29,8 +37,11 @@ class CommandOutputViewer(QWidget):
         cursor.movePosition(QTextCursor.End)
         
         if color:
-            fmt = QTextCharFormat()
-            fmt.setForeground(QColor(color))
+            fmt = self._FMT_CACHE.get(color)
+            if fmt is None:
+                fmt = QTextCharFormat()
+                fmt.setForeground(QColor(color))
+                self._FMT_CACHE[color] = fmt
             cursor.insertText(text, fmt)
         else:
             cursor.insertText(text)
@@ -1,75 +1,130 @@
 import os
 import json
+import logging
+import tempfile
+
+try:
+    import orjson # Optional: much faster parse/serialize than the stdlib json module
+except ImportError:
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+
+def _json_loads(raw: bytes):
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+def _json_dumps(data) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2)
+    return json.dumps(data, indent=4).encode('utf-8')
+
+
+def _write_atomic(path: str, payload: bytes):
+    """
+    Writes payload to a temporary file next to path and renames it into place,
+    so a crash mid-write never leaves a truncated file behind.
+    """
+    dir_path = os.path.dirname(path)
+    fd, tmp_path = tempfile.mkstemp(dir=dir_path, prefix=os.path.basename(path) + '.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(payload)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
 
 class ConfigManager:
     """
-    Manages the application's configuration, such as API keys,
-    stored in a JSON file in the user's home directory.
+    Manages the application's configuration, stored in a JSON file in the
+    user's home directory. The API key is kept in a separate small file.
     """
 
+    def __init__(self):
+        # Nothing touches the disk until a setting is first loaded or saved.
+        config_dir = os.path.join(os.path.expanduser('~'), '.aether_editor')
+        self._config_path = os.path.join(config_dir, 'config.json')
+        # The API key lives in its own tiny file so saving it never rewrites config.json
+        self._api_key_path = os.path.join(config_dir, 'api_key')
+        self._config_dir_ready = False # Set once the config directory is known to exist
+
     def _get_config_path(self) -> str:
         """
-        Constructs the path to the config.json file.
-        Ensures the configuration directory exists.
+        Returns the path to the config.json file, computed once in __init__.
         ~/.aether_editor/config.json
+        The directory is only created when the configuration is first written.
         """
-        dir_path = os.path.join(os.path.expanduser('~'), '.aether_editor')
-        os.makedirs(dir_path, exist_ok=True)
-        return os.path.join(dir_path, 'config.json')
+        return self._config_path
 
-    def save_api_key(self, api_key: str):
+    def _ensure_config_dir(self):
+        """Creates ~/.aether_editor on first write; later calls are free."""
+        if not self._config_dir_ready:
+            os.makedirs(os.path.dirname(self._config_path), exist_ok=True)
+            self._config_dir_ready = True
+
+    def _load_config_data(self) -> dict:
         """
-        Saves the API key to the configuration file.
+        Returns the parsed contents of config.json.
+        A missing, unreadable or corrupt file yields an empty dict.
         """
         config_path = self._get_config_path()
-        data = {}
         try:
-            if os.path.exists(config_path):
-                with open(config_path, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-        except (IOError, json.JSONDecodeError) as e:
-            print(f"ConfigManager: Error reading existing config file at {config_path}: {e}. Starting fresh.")
-            data = {} # Start with an empty dict if file is corrupted or unreadable
-
-        data['api_key'] = api_key
+            with open(config_path, 'rb') as f:
+                data = _json_loads(f.read())
+            logger.debug("Config data loaded from %s", config_path)
+            return data
+        except FileNotFoundError:
+            logger.debug("Config file not found at %s", config_path)
+        except ValueError as e: # json/orjson JSONDecodeError, or invalid UTF-8
+            logger.warning("Error decoding JSON from %s: %s", config_path, e)
+        except OSError as e:
+            logger.warning("Error reading file %s: %s", config_path, e)
+        return {}
 
+    def save_api_key(self, api_key: str):
+        """
+        Saves the API key to its dedicated file (~/.aether_editor/api_key).
+        """
         try:
-            with open(config_path, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=4)
-            print(f"ConfigManager: API key saved to {config_path}")
-        except IOError as e:
-            print(f"ConfigManager: Error writing config file to {config_path}: {e}")
+            self._ensure_config_dir()
+            _write_atomic(self._api_key_path, api_key.encode('utf-8'))
+        except OSError as e:
+            logger.error("Error writing API key file to %s: %s", self._api_key_path, e)
+            return
+        logger.debug("API key saved to %s", self._api_key_path)
 
     def load_api_key(self) -> str | None:
         """
-        Loads the API key from the configuration file.
+        Loads the API key from its dedicated file.
+        Falls back to the 'api_key' field of config.json written by older versions.
         Returns the API key string if found, otherwise None.
         """
-        config_path = self._get_config_path()
-
-        if not os.path.exists(config_path):
-            print(f"ConfigManager: Config file not found at {config_path}")
-            return None
-
         try:
-            with open(config_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            api_key = data.get('api_key')
-            if api_key:
-                print(f"ConfigManager: API key loaded from {config_path}")
-            else:
-                print(f"ConfigManager: 'api_key' not found in {config_path}")
+            with open(self._api_key_path, 'r', encoding='utf-8') as f:
+                api_key = f.read().strip()
+            logger.debug("API key loaded from %s", self._api_key_path)
             return api_key
-        except json.JSONDecodeError as e:
-            print(f"ConfigManager: Error decoding JSON from {config_path}: {e}")
-            return None
-        except IOError as e:
-            print(f"ConfigManager: Error reading file {config_path}: {e}")
-            return None
-        except Exception as e: # Catch any other potential errors
-            print(f"ConfigManager: An unexpected error occurred while loading API key: {e}")
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e: # ValueError covers invalid UTF-8
+            logger.warning("Error reading API key file %s: %s", self._api_key_path, e)
             return None
 
+        data = self._load_config_data()
+        if 'api_key' in data:
+            logger.debug("API key loaded from legacy config %s", self._get_config_path())
+        else:
+            logger.debug("'api_key' not found in %s or %s", self._api_key_path, self._get_config_path())
+        return data.get('api_key')
+
 if __name__ == '__main__':
     # Test the ConfigManager
     manager = ConfigManager()
@@ -88,32 +143,33 @@ if __name__ == '__main__':
     else:
         print("Failed to load API key or key not set.")
 
-    # Test loading when no key is present (first clear the file or save a different structure)
+    # Test loading when no key is present (remove the key file so the legacy config.json is consulted)
     print("\nTesting loading when API key might be absent or file corrupted...")
     config_file_path = manager._get_config_path()
-    
+    api_key_file_path = manager._api_key_path
+    os.remove(api_key_file_path)
+
     # Simulate corrupted JSON
-    if os.path.exists(config_file_path):
-        with open(config_file_path, 'w', encoding='utf-8') as f:
-            f.write("this is not json")
+    with open(config_file_path, 'w', encoding='utf-8') as f:
+        f.write("this is not json")
     loaded_key = manager.load_api_key()
     print(f"Loaded API key after simulated corruption: {loaded_key}")
     assert loaded_key is None
 
-    # Simulate file with no API key
-    manager.save_api_key("another_key_temp") # Save normally first
-    with open(config_file_path, 'r', encoding='utf-8') as f:
-        temp_data = json.load(f)
-    if 'api_key' in temp_data:
-        del temp_data['api_key'] # Remove the key
-        temp_data['other_setting'] = 'some_value'
-        with open(config_file_path, 'w', encoding='utf-8') as f:
-            json.dump(temp_data, f, indent=4) # Save without api_key
-            
+    # Simulate config file with no API key
+    with open(config_file_path, 'w', encoding='utf-8') as f:
+        json.dump({'other_setting': 'some_value'}, f, indent=4) # Save without api_key
     loaded_key = manager.load_api_key()
     print(f"Loaded API key after removing 'api_key' field: {loaded_key}")
     assert loaded_key is None
-    
+
+    # Simulate a key stored by an older version in config.json
+    with open(config_file_path, 'w', encoding='utf-8') as f:
+        json.dump({'other_setting': 'some_value', 'api_key': 'legacy_key'}, f, indent=4)
+    loaded_key = manager.load_api_key()
+    print(f"Loaded API key from legacy config: {loaded_key}")
+    assert loaded_key == 'legacy_key'
+
     # Test saving again to ensure it recovers
     print(f"\nAttempting to save API key again: {test_key}")
     manager.save_api_key(test_key)
@@ -3,6 +3,8 @@ from PySide6.QtCore import Qt, Slot
 from PySide6.QtGui import QIntValidator
 
 class ConnectionDialog(QDialog):
+    _port_validator = None # Shared by every dialog; created on first use since it needs a QApplication
+
     def __init__(self, parent=None):
         super().__init__(parent)
         self.setWindowTitle("Connect to Host / Start Hosting")
@@ -29,7 +31,9 @@ class ConnectionDialog(QDialog):
         port_layout.addWidget(QLabel("Port:"))
         self.port_input = QLineEdit(self)
         self.port_input.setText(str(self.port))
-        self.port_input.setValidator(QIntValidator(1024, 65535, self)) # Valid ports
+        if ConnectionDialog._port_validator is None:
+            ConnectionDialog._port_validator = QIntValidator(1024, 65535) # Valid ports
+        self.port_input.setValidator(ConnectionDialog._port_validator)
         port_layout.addWidget(self.port_input)
         main_layout.addLayout(port_layout)
 
@@ -41,11 +45,11 @@ class ConnectionDialog(QDialog):
 
         self.setLayout(main_layout)
 
-    def get_details(self):
-        # Static method to show dialog and return results
-        dialog = ConnectionDialog(self.parent()) # Pass parent for proper centering
-        if dialog.exec() == QDialog.Accepted:
-            ip = dialog.ip_input.text()
-            port = int(dialog.port_input.text())
-            return ip, port
+    @staticmethod
+    def get_details(parent=None):
+        # Show the dialog and return (ip, port), or (None, None) if cancelled
+        dialog = ConnectionDialog(parent) # Pass parent for proper centering
+        if dialog.exec() == QDialog.Accepted and dialog.port_input.hasAcceptableInput():
+            # The validator has already checked the text is a port number in range
+            return dialog.ip_input.text(), int(dialog.port_input.text(), 10)
         return None, None
\ No newline at end of file
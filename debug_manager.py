@@ -1,48 +1,263 @@
 import json
+import logging
 import socket # For finding an open port
 from contextlib import closing
 import sys # For sys.executable
-from PySide6.QtCore import QObject, Signal, QProcess, QThread, QTimer
+from PySide6.QtCore import QObject, Signal, Slot, SIGNAL, QProcess, QThread, QTimer, QByteArray
 from PySide6.QtNetwork import QTcpSocket
 from PySide6.QtNetwork import QAbstractSocket # For error types if needed
 
+try:
+    import orjson # Optional: much faster DAP message encoding/decoding than the stdlib json module
+except ImportError:
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+
+def _dap_dumps(message: dict) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(message)
+    return json.dumps(message).encode('utf-8')
+
+
+def _dap_loads(payload: memoryview) -> dict:
+    # orjson parses straight out of the receive buffer; json needs its own bytes copy
+    if orjson is not None:
+        return orjson.loads(payload)
+    return json.loads(bytes(payload))
+
+# DAP event / response command -> DebugManager handler method, replacing if/elif chains
+_EVENT_HANDLERS: dict[str, str] = {
+    "stopped": "_on_stopped_event",
+    "continued": "_on_continued_event",
+    "terminated": "_on_terminated_event",
+    "output": "_on_output_event",
+    "module": "_on_module_event",
+    "thread": "_on_thread_event",
+}
+_RESPONSE_HANDLERS: dict[str, str] = {
+    "initialize": "_on_initialize_response",
+    "launch": "_on_launch_response",
+    "setBreakpoints": "_on_set_breakpoints_response",
+    "configurationDone": "_on_configuration_done_response",
+    "stackTrace": "_on_stack_trace_response",
+    "scopes": "_on_scopes_response",
+    "variables": "_on_variables_response",
+}
+
+
+class VariablesView:
+    """
+    Variables of a scope or expanded variable, stored as parallel per-field lists
+    (row i is names[i], types[i], values[i], refs[i]) rather than one dict per variable.
+    """
+    __slots__ = ('names', 'types', 'values', 'refs')
+
+    def __init__(self):
+        self.names: list[str] = []
+        self.types: list[str] = []
+        self.values: list[str] = []
+        self.refs: list[int] = [] # variablesReference; > 0 means the variable has children
+
+    def __len__(self):
+        return len(self.names)
+
+    def append_dap(self, var: dict):
+        self.names.append(var.get("name"))
+        self.types.append(var.get("type", "Unknown Type"))
+        self.values.append(var.get("value", "N/A"))
+        self.refs.append(var.get("variablesReference", 0))
+
+    def extend(self, other: 'VariablesView'):
+        self.names.extend(other.names)
+        self.types.extend(other.types)
+        self.values.extend(other.values)
+        self.refs.extend(other.refs)
+
+
+class DapIoWorker(QObject):
+    """
+    Owns the DAP socket on a background thread. Incoming frames are split and
+    JSON-decoded there, so the GUI thread only receives ready-made message dicts.
+    """
+    message_received = Signal(object) # Parsed DAP message (dict)
+    connected = Signal()
+    disconnected = Signal()
+    socket_error = Signal(str)
+
+    # DAP base protocol header around each message's byte length
+    _HDR_PREFIX = b"Content-Length: "
+    _HDR_SUFFIX = b"\r\n\r\n"
+
+    def __init__(self, host: str, port: int):
+        super().__init__()
+        self.host = host
+        self.port = port
+        self.socket = None # Created in open(), on the worker thread
+        self._buffer = bytearray()
+        self._buffer_pos = 0 # Start of the first unparsed byte in _buffer
+
+    @Slot()
+    def open(self):
+        self.socket = QTcpSocket(self)
+        self.socket.connected.connect(self.connected)
+        self.socket.disconnected.connect(self.disconnected)
+        self.socket.readyRead.connect(self._handle_ready_read)
+        self.socket.errorOccurred.connect(self._handle_socket_error)
+        self.socket.connectToHost(self.host, self.port)
+
+    @Slot(bytes)
+    def write(self, data: bytes):
+        if self.socket is not None:
+            self.socket.write(data)
+            self.socket.flush() # Push the request out now rather than on the next event loop pass
+
+    @Slot(bool)
+    def close(self, graceful: bool):
+        """Closes the socket after any queued writes and ends the worker thread."""
+        if self.socket is not None:
+            self.socket.blockSignals(True) # DebugManager is already tearing the session down
+            if graceful:
+                self.socket.disconnectFromHost() # Sends anything still buffered first
+                if self.socket.state() != QAbstractSocket.SocketState.UnconnectedState:
+                    self.socket.waitForDisconnected(1000)
+            else:
+                self.socket.abort()
+        self.thread().quit()
+
+    @Slot(QAbstractSocket.SocketError)
+    def _handle_socket_error(self, error: QAbstractSocket.SocketError):
+        self.socket_error.emit(f"{error} - {self.socket.errorString()}")
+
+    @Slot()
+    def _handle_ready_read(self):
+        self._buffer.extend(self.socket.readAll().data())
+
+        # Parsed messages are skipped by advancing _buffer_pos rather than by
+        # re-slicing the buffer, which would copy everything after each message.
+        while True:
+            try:
+                buffer = self._buffer
+                header_start = self._buffer_pos
+                # A well-formed stream always has the header right at the cursor
+                if not buffer.startswith(self._HDR_PREFIX, header_start):
+                    if len(buffer) - header_start < len(self._HDR_PREFIX):
+                        break # Need more data for header
+                    header_start = buffer.find(self._HDR_PREFIX, header_start) # Resync after junk
+                    if header_start == -1:
+                        break # Need more data for header
+                    logger.warning("Skipped %d unexpected bytes before DAP header.", header_start - self._buffer_pos)
+                    self._buffer_pos = header_start
+
+                length_start = header_start + len(self._HDR_PREFIX)
+                line_end = buffer.find(b"\r\n", length_start)
+                if line_end == -1 or len(buffer) < line_end + 4:
+                    break # Need more data for header end
+                content_length = int(buffer[length_start:line_end])
+
+                if buffer.startswith(b"\r\n", line_end + 2): # Content-Length is the only header DAP sends
+                    json_start_pos = line_end + 4
+                else: # Tolerate extra header fields by skipping to the blank line
+                    header_end_pos = buffer.find(b"\r\n\r\n", line_end)
+                    if header_end_pos == -1:
+                        break # Need more data for header end
+                    json_start_pos = header_end_pos + 4
+                total_message_size = json_start_pos + content_length
+
+                if len(self._buffer) < total_message_size:
+                    break # Message incomplete
+
+                self._buffer_pos = total_message_size # Consume message from buffer
+                # A view instead of a slice avoids copying the payload. Views must be released
+                # before the buffer is resized, hence the with-blocks.
+                with memoryview(self._buffer) as view, view[json_start_pos:total_message_size] as payload:
+                    dap_message = _dap_loads(payload)
+
+                if logger.isEnabledFor(logging.DEBUG): # Skip formatting payloads unless debugging
+                    logger.debug("DAP Recv: %s", dap_message)
+                self.message_received.emit(dap_message)
+
+                # If a message was processed, continue to check for more in buffer
+                continue
+            except ValueError as e: # Includes JSONDecodeError
+                logger.error("Could not parse DAP message header or JSON: %s", e)
+                # Potentially clear buffer or handle malformed message
+                # For now, break and wait for more data, assuming it might be a partial message
+                break
+            except Exception as e:
+                logger.error("Unexpected error processing DAP message: %s", e)
+                # Consider clearing buffer or more robust error handling
+                break # Stop processing to avoid error loops
+
+        # Drop consumed bytes once they are everything, or a large share of the buffer
+        if self._buffer_pos >= len(self._buffer):
+            self._buffer.clear()
+            self._buffer_pos = 0
+        elif self._buffer_pos > 65536 or self._buffer_pos > len(self._buffer) // 2:
+            del self._buffer[:self._buffer_pos]
+            self._buffer_pos = 0
+
+
 class DebugManager(QObject):
     # Signals
     session_started = Signal()
     session_stopped = Signal()
-    # For paused: thread_id (int), reason (str), call_stack (list of dicts), variables (list of dicts)
+    # For paused: thread_id (int), reason (str), call_stack (list of dicts), variables (VariablesView)
     # Example for call_stack item: {'id': frame_id, 'name': frame_name, 'file': file_path, 'line': line_num}
-    # Example for variables item: {'name': var_name, 'type': var_type, 'value': var_value, 'variablesReference': ref_id_for_children}
-    paused = Signal(int, str, list, list)
+    paused = Signal(int, str, list, object)
     resumed = Signal()
+    # Raw output of the debugged script: data, stream ("stdout" or "stderr"). Left undecoded
+    # so a console can decode just what it shows; nothing is decoded while unconnected.
+    child_output = Signal(QByteArray, str)
+    _CHILD_OUTPUT_SIGNAL = SIGNAL("child_output(QByteArray,QString)") # For receivers()
+
+    _HDR_PREFIX = DapIoWorker._HDR_PREFIX
+    _HDR_SUFFIX = DapIoWorker._HDR_SUFFIX
+    # Variables of a scope fetched on demand via fetch_scope_variables: scope name, variables (as in paused)
+    scope_variables_loaded = Signal(str, object)
+    # Children of an expandable variable, via expand_variable: variablesReference, variables (as in paused)
+    variable_children_loaded = Signal(int, object)
+
+    # Cross-thread requests to the DapIoWorker; queued, so they run in emission order
+    _io_write = Signal(bytes)
+    _io_close = Signal(bool) # graceful
 
     def __init__(self, parent=None):
         super().__init__(parent)
 
-        self.dap_client = None  # QTcpSocket for DAP communication
+        self._io_thread = None # QThread running the DapIoWorker
+        self._io_worker = None # DapIoWorker owning the QTcpSocket for DAP communication
+        self._dap_connected = False
         self.debugger_process = None  # QProcess for the user's script with debugpy
 
-        self.breakpoints = {}
+        self.breakpoints: dict[str, tuple[int, ...]] = {} # path -> sorted, unique lines
 
         self.host = "127.0.0.1"
         self.port = 0 # Will be dynamically assigned
 
         self._dap_seq = 1
-        self._buffer = bytearray()
 
         self._active_thread_id = None
         self._call_stack_data = []
-        self._variables_data = []
-        self._scopes_references = {}
+        self._variables = VariablesView()
+        # Only the first scope (usually Locals) is fetched when execution stops;
+        # the others wait here until the UI asks for them.
+        self._deferred_scopes = {} # scope name -> variablesReference
+        self._scope_variable_requests = {} # request seq -> scope name, for on-demand fetches
+        self._child_variable_requests = {} # request seq -> variablesReference, for expand_variable
         self._pending_variable_requests = 0
 
         self._connect_timer = QTimer(self)
         self._connect_timer.setSingleShot(True)
         self._connect_timer.timeout.connect(self._handle_connect_timeout)
 
-        self._dap_request_pending_response = {}
+        self._pending_requests: dict[int, str] = {} # request seq -> command, until its response arrives
+        self._handshake_flags: set[str] = set() # 'initialize_complete', 'launch_complete', 'handshake_complete'
         self._pending_breakpoint_sync_count = 0
         self._current_stop_reason = ""
+        # Lines last sent to the adapter for each file in this session, to skip identical resends
+        self._sent_breakpoints: dict[str, tuple[int, ...]] = {}
 
     def _get_next_dap_seq(self):
         current_seq = self._dap_seq
@@ -50,11 +265,10 @@ class DebugManager(QObject):
         return current_seq
 
     def _handle_connect_timeout(self):
-        print("DebugManager: Connection to debugpy timed out.")
-        if self.dap_client:
-            self.dap_client.abort()
+        logger.warning("Connection to debugpy timed out.")
+        self._shutdown_io(graceful=False)
         if self.debugger_process and self.debugger_process.state() != QProcess.ProcessState.NotRunning:
-            print("DebugManager: Terminating debugger process due to connection timeout.")
+            logger.debug("Terminating debugger process due to connection timeout.")
             self.debugger_process.terminate()
             if not self.debugger_process.waitForFinished(1000):
                 self.debugger_process.kill()
@@ -62,15 +276,16 @@ class DebugManager(QObject):
 
     def _find_free_port(self):
         with closing(socket.socket(socket.AF_INET, socket.SOCK_STREAM)) as s:
-            s.bind((self.host, 0))
+            # Socket options only affect a bind made after them, so set them first.
+            # This lets debugpy bind the port straight after this probe socket closes.
             s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            if hasattr(socket, "SO_REUSEPORT"): # Linux/BSD/macOS only
+                s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+            s.bind((self.host, 0))
             return s.getsockname()[1]
 
-    def _send_dap_request(self, command: str, arguments: dict = None, request_seq_to_store=None):
-        if not self.dap_client or not self.dap_client.isOpen():
-            print(f"DebugManager Error: DAP client not connected. Cannot send {command}.")
-            return
-
+    def _build_dap_frame(self, command: str, arguments: dict = None):
+        """Assigns a seq to the request, records it as pending and returns (seq, header, body)."""
         request_seq = self._get_next_dap_seq()
         request = {
             "seq": request_seq,
@@ -80,291 +295,326 @@ class DebugManager(QObject):
         if arguments is not None:
             request["arguments"] = arguments
 
-        # If request_seq_to_store is provided, it means this request is part of a sequence
-        # or we want to track its specific response using its own sequence number.
-        # For now, let's use the request's own sequence number to track its response.
-        if request_seq_to_store is None:
-            request_seq_to_store = request_seq # Default to tracking response for this request
-
-        self._dap_request_pending_response[request_seq_to_store] = command
         # Storing command to know what response we are waiting for.
+        self._pending_requests[request_seq] = command
 
-        json_request = json.dumps(request).encode('utf-8')
-        header = f"Content-Length: {len(json_request)}\r\n\r\n".encode('utf-8')
+        json_request = _dap_dumps(request)
+        header = self._HDR_PREFIX + str(len(json_request)).encode('ascii') + self._HDR_SUFFIX
+        return request_seq, header, json_request
 
-        self.dap_client.write(header + json_request)
-        print(f"DAP Sent: {request}")
+    def is_connected(self) -> bool:
+        """True while the DAP socket to debugpy is connected."""
+        return self._dap_connected
 
-    def _handle_dap_ready_read(self):
-        if not self.dap_client:
+    def _send_dap_request(self, command: str, arguments: dict = None):
+        if not self._dap_connected:
+            logger.error("DAP client not connected. Cannot send %s.", command)
             return
 
-        self._buffer.extend(self.dap_client.readAll().data())
-
-        while True:
-            try:
-                content_length_header_start = self._buffer.find(b"Content-Length: ")
-                if content_length_header_start == -1:
-                    break # Need more data for header
-
-                header_end_marker = b"\r\n\r\n"
-                header_end_pos = self._buffer.find(header_end_marker, content_length_header_start)
-                if header_end_pos == -1:
-                    break # Need more data for header end
-
-                content_length_str = self._buffer[content_length_header_start + len(b"Content-Length: "):header_end_pos].decode('utf-8')
-                content_length = int(content_length_str)
-
-                json_start_pos = header_end_pos + len(header_end_marker)
-                total_message_size = json_start_pos + content_length
-
-                if len(self._buffer) < total_message_size:
-                    break # Message incomplete
+        request_seq, header, json_request = self._build_dap_frame(command, arguments)
 
-                message_bytes = self._buffer[:total_message_size]
-                self._buffer = self._buffer[total_message_size:] # Consume message from buffer
+        # One cross-thread hand-off per request; the worker's socket does the actual write
+        self._io_write.emit(header + json_request)
+        return request_seq
 
-                json_payload_bytes = message_bytes[json_start_pos:]
-                json_payload = json_payload_bytes.decode('utf-8')
-                dap_message = json.loads(json_payload)
+    def _send_dap_batch(self, requests: list[tuple[str, dict]]):
+        """Sends several requests with a single write and flush. Returns their seqs in order."""
+        if not self._dap_connected:
+            logger.error("DAP client not connected. Cannot send %d batched request(s).", len(requests))
+            return []
 
-                print(f"DAP Recv: {dap_message}")
-                self._dispatch_dap_message(dap_message)
+        buf = bytearray()
+        seqs = []
+        for command, arguments in requests:
+            request_seq, header, json_request = self._build_dap_frame(command, arguments)
+            buf += header
+            buf += json_request
+            seqs.append(request_seq)
 
-                # If a message was processed, continue to check for more in buffer
-                continue
-            except ValueError as e: # Includes JSONDecodeError
-                print(f"DebugManager Error: Could not parse DAP message header or JSON: {e}")
-                # Potentially clear buffer or handle malformed message
-                # For now, break and wait for more data, assuming it might be a partial message
-                break
-            except Exception as e:
-                print(f"DebugManager Error: Unexpected error processing DAP message: {e}")
-                # Consider clearing buffer or more robust error handling
-                break # Stop processing to avoid error loops
+        if buf:
+            self._io_write.emit(bytes(buf))
+        return seqs
 
+    @Slot(object)
     def _dispatch_dap_message(self, message: dict):
+        if self.sender() is not self._io_worker:
+            return # Queued before the worker of a previous session was shut down
         msg_type = message.get("type")
         if msg_type == "event":
             self._handle_dap_event(message)
         elif msg_type == "response":
             request_seq = message.get("request_seq")
             # Check if we were waiting for this response
-            if request_seq in self._dap_request_pending_response:
-                # Potentially use the command stored in _dap_request_pending_response[request_seq]
-                # to guide handling, then remove it.
-                del self._dap_request_pending_response[request_seq]
-            else:
-                print(f"DebugManager Warning: Received response for untracked request_seq: {request_seq}")
+            if self._pending_requests.pop(request_seq, None) is None:
+                logger.warning("Received response for untracked request_seq: %s", request_seq)
             self._handle_dap_response(message)
         else:
-            print(f"DebugManager Warning: Unknown DAP message type received: {msg_type}")
+            logger.warning("Unknown DAP message type received: %s", msg_type)
 
     def _handle_dap_event(self, event_message: dict):
         event_name = event_message.get("event")
         body = event_message.get("body", {})
-        print(f"DAP Event Received: {event_name}, Body: {body}")
-
-        if event_name == "stopped":
-            print("DebugManager: Received 'stopped' event.")
-            thread_id = body.get("threadId")
-            reason = body.get("reason", "unknown")
-            if thread_id is None:
-                print("DebugManager Error: 'stopped' event received without threadId.")
-                return
-
-            self._active_thread_id = thread_id
-            self._current_stop_reason = reason # Store reason
-            self._call_stack_data.clear()
-            self._variables_data.clear()
-            self._scopes_references.clear()
-
-            print(f"DebugManager: Requesting stack trace for thread {thread_id}.")
-            self._send_dap_request("stackTrace", arguments={"threadId": thread_id}, request_seq_to_store=f"stackTrace_{thread_id}")
-
-        elif event_name == "continued":
-            print("DebugManager: Received 'continued' event.")
-            thread_id = body.get("threadId")
-            # If allThreadsContinued is true, or if the specific thread that was active is continued
-            if body.get("allThreadsContinued", True) or thread_id == self._active_thread_id:
-                self.resumed.emit()
-                self._active_thread_id = None # No longer actively stopped in this thread
-                self._current_stop_reason = ""
-                self._call_stack_data.clear()
-                self._variables_data.clear()
-                self._scopes_references.clear()
-
-        elif event_name == "terminated":
-            print("DebugManager: Received 'terminated' event. Stopping session.")
-            self.stop_session() # This will emit session_stopped
-
-        elif event_name == "output":
-            category = body.get("category", "console")
-            output = body.get("output", "")
-            print(f"DAP Output ({category}): {output.strip()}")
-            # Later, route this to a debug console in MainWindow via a signal
-
-        elif event_name == "module":
-            # Optional: good for debugging DAP communication
-            print(f"DAP Module Event: Reason: {body.get('reason')}, Module: {body.get('module')}")
-
-        elif event_name == "thread":
-            # Optional: good for debugging DAP communication
-            print(f"DAP Thread Event: Reason: {body.get('reason')}, Thread ID: {body.get('threadId')}")
+        if logger.isEnabledFor(logging.DEBUG): # Skip formatting payloads unless debugging
+            logger.debug("DAP Event Received: %s, Body: %s", event_name, body)
+
+        handler_name = _EVENT_HANDLERS.get(event_name)
+        if handler_name is not None:
+            getattr(self, handler_name)(body)
+
+    def _on_stopped_event(self, body: dict):
+        logger.debug("Received 'stopped' event.")
+        thread_id = body.get("threadId")
+        reason = body.get("reason", "unknown")
+        if thread_id is None:
+            logger.error("'stopped' event received without threadId.")
+            return
 
+        self._active_thread_id = thread_id
+        self._current_stop_reason = reason # Store reason
+        self._call_stack_data.clear()
+        self._variables = VariablesView()
+        self._deferred_scopes.clear()
+        self._scope_variable_requests.clear()
+        self._child_variable_requests.clear()
+
+        logger.debug("Requesting stack trace for thread %s.", thread_id)
+        self._send_dap_request("stackTrace", arguments={"threadId": thread_id})
+
+    def _on_continued_event(self, body: dict):
+        logger.debug("Received 'continued' event.")
+        thread_id = body.get("threadId")
+        # If allThreadsContinued is true, or if the specific thread that was active is continued
+        if body.get("allThreadsContinued", True) or thread_id == self._active_thread_id:
+            self.resumed.emit()
+            self._active_thread_id = None # No longer actively stopped in this thread
+            self._current_stop_reason = ""
+            self._call_stack_data.clear()
+            self._variables = VariablesView()
+            self._deferred_scopes.clear()
+            self._scope_variable_requests.clear()
+            self._child_variable_requests.clear()
+
+    def _on_terminated_event(self, body: dict):
+        logger.debug("Received 'terminated' event. Stopping session.")
+        self.stop_session() # This will emit session_stopped
+
+    def _on_output_event(self, body: dict):
+        category = body.get("category", "console")
+        output = body.get("output", "")
+        if logger.isEnabledFor(logging.DEBUG): # Skip formatting payloads unless debugging
+            logger.debug("DAP Output (%s): %s", category, output.strip())
+        # Later, route this to a debug console in MainWindow via a signal
+
+    def _on_module_event(self, body: dict):
+        # Optional: good for debugging DAP communication
+        if logger.isEnabledFor(logging.DEBUG): # Skip formatting payloads unless debugging
+            logger.debug("DAP Module Event: Reason: %s, Module: %s", body.get('reason'), body.get('module'))
+
+    def _on_thread_event(self, body: dict):
+        # Optional: good for debugging DAP communication
+        if logger.isEnabledFor(logging.DEBUG): # Skip formatting payloads unless debugging
+            logger.debug("DAP Thread Event: Reason: %s, Thread ID: %s", body.get('reason'), body.get('threadId'))
 
     def _handle_dap_response(self, response_message: dict):
         request_command = response_message.get("command")
         success = response_message.get("success", False)
         request_seq = response_message.get("request_seq") # Used for logging/debugging specific requests
+        body = response_message.get("body", {})
 
-        print(f"DAP Response for '{request_command}' (req_seq: {request_seq}): Success={success}, Body: {response_message.get('body')}")
-
-        if request_command == "initialize":
-            if success:
-                print("DebugManager: Initialize successful.")
-                self._dap_request_pending_response['initialize_complete'] = True
-                # Launch the debugger. For debugpy, 'program' is often optional if script was passed at launch.
-                # Sending it as None or omitting it might be necessary.
-                # If debugpy was started with --wait-for-client and the script, this launch request might be
-                # more of a formality or for specific launch configurations not used here.
-                # Some debug adapters might not need a separate "launch" after "attach" if script is pre-specified.
-                # Let's assume a simple launch is fine.
-                self._send_dap_request("launch", arguments={"program": None}, request_seq_to_store="launch")
-            else:
-                print("DebugManager Error: Initialize failed!")
-                self.stop_session()
-
-        elif request_command == "launch":
-            if success:
-                print("DebugManager: Launch successful.")
-                self._dap_request_pending_response['launch_complete'] = True
-                self._synchronize_all_breakpoints_on_startup()
-            else:
-                print("DebugManager Error: Launch failed!")
-                self.stop_session()
-
-        elif request_command == "setBreakpoints":
-            # Response body contains actual breakpoints set by the adapter
-            # For now, just log it. We might use this to update our internal state if needed.
-            print(f"DebugManager: Breakpoints set for request_seq {request_seq}. Body: {response_message.get('body')}")
-            if self._pending_breakpoint_sync_count > 0:
-                self._pending_breakpoint_sync_count -= 1
-                if self._pending_breakpoint_sync_count == 0:
-                    print("DebugManager: All initial breakpoints synchronized. Sending ConfigurationDone.")
-                    self._send_dap_request("configurationDone", request_seq_to_store="configurationDone")
-
-        elif request_command == "configurationDone":
-            if success:
-                print("DebugManager: ConfigurationDone successful. Debug session should be running.")
-                self._dap_request_pending_response['handshake_complete'] = True
-                self.session_started.emit()
-            else:
-                print("DebugManager Error: ConfigurationDone failed!")
-                self.stop_session()
+        if logger.isEnabledFor(logging.DEBUG): # Skip formatting payloads unless debugging
+            logger.debug("DAP Response for '%s' (req_seq: %s): Success=%s, Body: %s", request_command, request_seq, success, body)
+
+        handler_name = _RESPONSE_HANDLERS.get(request_command)
+        if handler_name is not None:
+            getattr(self, handler_name)(success, body, request_seq)
+
+    def _on_initialize_response(self, success: bool, body: dict, request_seq: int):
+        if success:
+            logger.debug("Initialize successful.")
+            self._handshake_flags.add('initialize_complete')
+            # Launch the debugger. For debugpy, 'program' is often optional if script was passed at launch.
+            # Sending it as None or omitting it might be necessary.
+            # If debugpy was started with --wait-for-client and the script, this launch request might be
+            # more of a formality or for specific launch configurations not used here.
+            # Some debug adapters might not need a separate "launch" after "attach" if script is pre-specified.
+            # Let's assume a simple launch is fine.
+            self._send_dap_request("launch", arguments={"program": None})
+        else:
+            logger.error("Initialize failed!")
+            self.stop_session()
 
-        # Handle other responses like stackTrace, scopes, variables in later steps
-        body = response_message.get("body", {})
+    def _on_launch_response(self, success: bool, body: dict, request_seq: int):
+        if success:
+            logger.debug("Launch successful.")
+            self._handshake_flags.add('launch_complete')
+            self._synchronize_all_breakpoints_on_startup()
+        else:
+            logger.error("Launch failed!")
+            self.stop_session()
 
-        if request_command == "stackTrace":
-            if success:
-                stack_frames = body.get("stackFrames", [])
-                self._call_stack_data.clear() # Clear previous stack data
-                for frame in stack_frames:
-                    frame_id = frame.get("id")
-                    frame_name = frame.get("name", "Unknown Frame")
-                    source_info = frame.get("source", {})
-                    file_path = source_info.get("path", source_info.get("name", "Unknown File"))
-                    line_num = frame.get("line", 0)
-                    self._call_stack_data.append({"id": frame_id, "name": frame_name, "file": file_path, "line": line_num})
-
-                if self._call_stack_data: # If we have frames
-                    top_frame_id = self._call_stack_data[0]["id"]
-                    print(f"DebugManager: Requesting scopes for top frame {top_frame_id}.")
-                    self._send_dap_request("scopes", arguments={"frameId": top_frame_id}, request_seq_to_store=f"scopes_{top_frame_id}")
-                else: # No stack frames, unusual if stopped.
-                    print("DebugManager: No stack frames received, cannot fetch variables.")
-                    self.paused.emit(self._active_thread_id, self._current_stop_reason, [], [])
-            else:
-                print("DebugManager Error: stackTrace request failed.")
-                self.paused.emit(self._active_thread_id, self._current_stop_reason, [], []) # Emit with empty data
-
-        elif request_command == "scopes":
-            if success:
-                self._scopes_references.clear() # Clear old scope references
-                self._variables_data.clear()    # Clear old variable data
-                scopes = body.get("scopes", [])
-                self._pending_variable_requests = 0
-                for scope in scopes:
-                    scope_name = scope.get("name")
-                    variables_reference = scope.get("variablesReference")
-                    if variables_reference > 0: # DAP spec: 0 means no variables/children
-                        self._scopes_references[scope_name] = variables_reference
-                        print(f"DebugManager: Requesting variables for scope '{scope_name}' (ref: {variables_reference}).")
-                        self._send_dap_request("variables", arguments={"variablesReference": variables_reference}, request_seq_to_store=f"variables_{variables_reference}")
-                        self._pending_variable_requests += 1
-
-                if self._pending_variable_requests == 0: # No scopes or no valid variable references
-                    print("DebugManager: No variables to request from scopes.")
-                    self.paused.emit(self._active_thread_id, self._current_stop_reason, list(self._call_stack_data), [])
-            else:
-                print("DebugManager Error: scopes request failed.")
-                self.paused.emit(self._active_thread_id, self._current_stop_reason, list(self._call_stack_data), [])
-
-        elif request_command == "variables":
-            if success:
-                variables = body.get("variables", [])
-                for var in variables:
-                    self._variables_data.append({
-                        "name": var.get("name"),
-                        "type": var.get("type", "Unknown Type"),
-                        "value": var.get("value", "N/A"),
-                        "variablesReference": var.get("variablesReference", 0) # For expandable objects
-                    })
-            else: # variables request failed
-                print(f"DebugManager Error: variables request failed for request_seq {request_seq}.")
-
-            # This logic handles responses for variables from potentially multiple scopes
-            if self._pending_variable_requests > 0: # Should always be true if we are here from a successful scopes req
-                 self._pending_variable_requests -= 1
-
-            if self._pending_variable_requests == 0: # All variable requests for this stop event are processed
-                print("DebugManager: All variable requests complete.")
-                self.paused.emit(self._active_thread_id, self._current_stop_reason, list(self._call_stack_data), list(self._variables_data))
+    def _on_set_breakpoints_response(self, success: bool, body: dict, request_seq: int):
+        # Response body contains actual breakpoints set by the adapter
+        # For now, just log it. We might use this to update our internal state if needed.
+        if logger.isEnabledFor(logging.DEBUG): # Skip formatting payloads unless debugging
+            logger.debug("Breakpoints set for request_seq %s. Body: %s", request_seq, body)
+        if self._pending_breakpoint_sync_count > 0:
+            self._pending_breakpoint_sync_count -= 1
+            if self._pending_breakpoint_sync_count == 0:
+                logger.debug("All initial breakpoints synchronized. Sending ConfigurationDone.")
+                self._send_dap_request("configurationDone")
+
+    def _on_configuration_done_response(self, success: bool, body: dict, request_seq: int):
+        if success:
+            logger.debug("ConfigurationDone successful. Debug session should be running.")
+            self._handshake_flags.add('handshake_complete')
+            self.session_started.emit()
+        else:
+            logger.error("ConfigurationDone failed!")
+            self.stop_session()
 
+    def _on_stack_trace_response(self, success: bool, body: dict, request_seq: int):
+        if success:
+            stack_frames = body.get("stackFrames", [])
+            self._call_stack_data.clear() # Clear previous stack data
+            for frame in stack_frames:
+                frame_id = frame.get("id")
+                frame_name = frame.get("name", "Unknown Frame")
+                source_info = frame.get("source", {})
+                file_path = source_info.get("path", source_info.get("name", "Unknown File"))
+                line_num = frame.get("line", 0)
+                self._call_stack_data.append({"id": frame_id, "name": frame_name, "file": file_path, "line": line_num})
+
+            if self._call_stack_data: # If we have frames
+                top_frame_id = self._call_stack_data[0]["id"]
+                logger.debug("Requesting scopes for top frame %s.", top_frame_id)
+                self._send_dap_request("scopes", arguments={"frameId": top_frame_id})
+            else: # No stack frames, unusual if stopped.
+                logger.debug("No stack frames received, cannot fetch variables.")
+                self.paused.emit(self._active_thread_id, self._current_stop_reason, [], VariablesView())
+        else:
+            logger.error("stackTrace request failed.")
+            self.paused.emit(self._active_thread_id, self._current_stop_reason, [], VariablesView()) # Emit with empty data
+
+    def _on_scopes_response(self, success: bool, body: dict, request_seq: int):
+        if success:
+            self._deferred_scopes.clear()
+            self._variables = VariablesView() # Fresh, as the previous one was handed to the UI
+            scopes = body.get("scopes", [])
+            self._pending_variable_requests = 0
+            for scope in scopes:
+                scope_name = scope.get("name")
+                variables_reference = scope.get("variablesReference")
+                if variables_reference > 0: # DAP spec: 0 means no variables/children
+                    if self._pending_variable_requests: # Not the first scope: fetch when expanded
+                        self._deferred_scopes[scope_name] = variables_reference
+                        continue
+                    logger.debug("Requesting variables for scope '%s' (ref: %s).", scope_name, variables_reference)
+                    self._send_dap_request("variables", arguments={"variablesReference": variables_reference})
+                    self._pending_variable_requests += 1
+
+            if self._pending_variable_requests == 0: # No scopes or no valid variable references
+                logger.debug("No variables to request from scopes.")
+                self.paused.emit(self._active_thread_id, self._current_stop_reason, list(self._call_stack_data), VariablesView())
+        else:
+            logger.error("scopes request failed.")
+            self.paused.emit(self._active_thread_id, self._current_stop_reason, list(self._call_stack_data), VariablesView())
+
+    def _on_variables_response(self, success: bool, body: dict, request_seq: int):
+        variables = VariablesView()
+        if success:
+            for var in body.get("variables", []):
+                variables.append_dap(var)
+        else: # variables request failed
+            logger.error("variables request failed for request_seq %s.", request_seq)
+
+        variables_reference = self._child_variable_requests.pop(request_seq, None)
+        if variables_reference is not None: # Answer to expand_variable
+            self.variable_children_loaded.emit(variables_reference, variables)
+            return
 
-    def _synchronize_all_breakpoints_on_startup(self):
-        print("DebugManager: Synchronizing all breakpoints on startup.")
-        if not self.breakpoints: # self.breakpoints is path -> {lines}
-            print("DebugManager: No breakpoints to synchronize. Sending ConfigurationDone directly.")
-            self._send_dap_request("configurationDone", request_seq_to_store="configurationDone")
+        scope_name = self._scope_variable_requests.pop(request_seq, None)
+        if scope_name is not None: # Answer to fetch_scope_variables, not part of the stop
+            self.scope_variables_loaded.emit(scope_name, variables)
+            return
+        self._variables.extend(variables)
+
+        # This logic handles responses for variables from potentially multiple scopes
+        if self._pending_variable_requests > 0: # Should always be true if we are here from a successful scopes req
+             self._pending_variable_requests -= 1
+
+        if self._pending_variable_requests == 0: # All variable requests for this stop event are processed
+            logger.debug("All variable requests complete.")
+            self.paused.emit(self._active_thread_id, self._current_stop_reason, list(self._call_stack_data), self._variables)
+
+
+    def deferred_scope_names(self) -> list:
+        """Names of the scopes of the current stop whose variables have not been fetched yet."""
+        return list(self._deferred_scopes)
+
+    def fetch_scope_variables(self, scope_name: str):
+        """
+        Requests the variables of a scope that was deferred when execution stopped.
+        The result is delivered through scope_variables_loaded.
+        """
+        variables_reference = self._deferred_scopes.pop(scope_name, None)
+        if variables_reference is None:
             return
+        logger.debug("Requesting variables for deferred scope '%s' (ref: %s).", scope_name, variables_reference)
+        request_seq = self._send_dap_request("variables", arguments={"variablesReference": variables_reference})
+        if request_seq is not None:
+            self._scope_variable_requests[request_seq] = scope_name
+
+    def expand_variable(self, variables_reference: int):
+        """
+        Fetches the children of an expandable variable of the current stop.
+        The result is delivered through variable_children_loaded.
+        """
+        request_seq = self._send_dap_request("variables", arguments={"variablesReference": variables_reference})
+        if request_seq is not None:
+            self._child_variable_requests[request_seq] = variables_reference
+
+    def _breakpoint_args(self, file_path: str, lines: tuple[int, ...]) -> dict | None:
+        """setBreakpoints arguments for file_path, or None if the adapter already has exactly these lines."""
+        if self._sent_breakpoints.get(file_path) == lines:
+            return None
+        self._sent_breakpoints[file_path] = lines
+        # DAP paths are typically absolute local paths.
+        # No URI conversion needed for debugpy with local paths.
+        return {
+            "source": {"path": file_path},
+            "breakpoints": [{"line": l} for l in lines] # Already unique and sorted
+        }
 
-        self._pending_breakpoint_sync_count = len(self.breakpoints)
+    def _synchronize_all_breakpoints_on_startup(self):
+        logger.debug("Synchronizing all breakpoints on startup.")
+        if not self.breakpoints: # self.breakpoints is path -> (sorted lines)
+            logger.debug("No breakpoints to synchronize. Sending ConfigurationDone directly.")
+            self._send_dap_request("configurationDone")
+            return
 
-        for file_path, lines_set in self.breakpoints.items():
-            if not lines_set: # Should not happen if update_internal_breakpoints cleans up empty sets
-                self._pending_breakpoint_sync_count -=1
+        # Frames for every file go out in one write instead of one per file
+        batch = []
+        for file_path, lines in self.breakpoints.items():
+            if not lines: # Should not happen if update_internal_breakpoints cleans up empty sets
                 continue
+            bp_args = self._breakpoint_args(file_path, lines)
+            if bp_args is not None:
+                batch.append(("setBreakpoints", bp_args))
 
-            # DAP paths are typically absolute local paths.
-            # No URI conversion needed for debugpy with local paths.
-            bp_args = {
-                "source": {"path": file_path},
-                "breakpoints": [{"line": l} for l in sorted(list(lines_set))]
-            }
-            # Use a unique seq store key for each file's breakpoints request
-            self._send_dap_request("setBreakpoints", arguments=bp_args, request_seq_to_store=f"setBreakpoints_startup_{file_path}")
+        self._pending_breakpoint_sync_count = len(batch)
+        self._send_dap_batch(batch)
 
         # If, after queuing, there are no pending syncs (e.g., all paths had empty line sets)
         if self._pending_breakpoint_sync_count == 0:
-            print("DebugManager: All breakpoint sets were empty. Sending ConfigurationDone.")
-            self._send_dap_request("configurationDone", request_seq_to_store="configurationDone")
+            logger.debug("All breakpoint sets were empty. Sending ConfigurationDone.")
+            self._send_dap_request("configurationDone")
 
 
+    @Slot()
     def _handle_dap_connected(self):
         self._connect_timer.stop()
-        print("DebugManager: DAP client connected to debugpy.")
+        self._dap_connected = True
+        logger.debug("DAP client connected to debugpy.")
         # Initiate DAP handshake
         self._send_dap_request(
             "initialize",
@@ -377,18 +627,19 @@ class DebugManager(QObject):
                 "supportsVariableType": True,
                 "supportsVariablePaging": True,
                 "supportsRunInTerminalRequest": True,
-            },
-            request_seq_to_store="initialize" # Track this specific request
+            }
         )
 
+    @Slot()
     def _handle_dap_disconnected(self):
-        print("DebugManager: DAP client disconnected.")
+        logger.debug("DAP client disconnected.")
+        self._dap_connected = False # Nothing more can be sent, not even 'disconnect'
         self.stop_session() # Ensure full cleanup
 
-    def _handle_dap_socket_error(self, error: QAbstractSocket.SocketError):
-        # socket_error = self.dap_client.error() # QAbstractSocket.SocketError enum
-        error_string = self.dap_client.errorString() if self.dap_client else "Unknown socket error"
-        print(f"DebugManager: DAP socket error: {error} - {error_string}")
+    @Slot(str)
+    def _handle_dap_socket_error(self, error_string: str):
+        logger.warning("DAP socket error: %s", error_string)
+        self._dap_connected = False
         if self._connect_timer.isActive(): # If error occurred during connection attempt
             self._connect_timer.stop()
         self.stop_session() # Ensure full cleanup
@@ -403,7 +654,7 @@ class DebugManager(QObject):
             QProcess.ProcessError.UnknownError: "UnknownError"
         }
         error_name = error_map.get(error, "UnknownError")
-        print(f"DebugManager: Debugger process error: {error_name}")
+        logger.warning("Debugger process error: %s", error_name)
         # If the process failed to start, it's a critical session issue.
         if error == QProcess.ProcessError.FailedToStart:
             self.stop_session()
@@ -414,31 +665,51 @@ class DebugManager(QObject):
             QProcess.ExitStatus.CrashExit: "CrashExit"
         }
         status_name = status_map.get(exit_status, "UnknownExitStatus")
-        print(f"DebugManager: Debugger process finished. Exit code: {exit_code}, Exit status: {status_name}")
+        logger.debug("Debugger process finished. Exit code: %s, Exit status: %s", exit_code, status_name)
         self.stop_session() # Ensure full cleanup and emit session_stopped
 
     def _handle_debugger_process_stdout(self):
         if self.debugger_process:
-            data = self.debugger_process.readAllStandardOutput().data().decode('utf-8', errors='replace')
-            print(f"Debugger STDOUT: {data.strip()}")
+            # Always drained, so QProcess does not buffer the script's output indefinitely
+            self._forward_child_output(self.debugger_process.readAllStandardOutput(), "stdout")
 
     def _handle_debugger_process_stderr(self):
         if self.debugger_process:
-            data = self.debugger_process.readAllStandardError().data().decode('utf-8', errors='replace')
-            print(f"Debugger STDERR: {data.strip()}")
+            self._forward_child_output(self.debugger_process.readAllStandardError(), "stderr")
+
+    def _forward_child_output(self, data: QByteArray, stream: str):
+        if self.receivers(self._CHILD_OUTPUT_SIGNAL):
+            self.child_output.emit(data, stream)
+        if logger.isEnabledFor(logging.DEBUG): # Skip decoding unless debugging
+            logger.debug("Debugger %s: %s", stream.upper(), data.data().decode('utf-8', errors='replace').strip())
+
 
+    def _shutdown_io(self, graceful: bool):
+        """Closes the DAP socket (after pending writes if graceful) and stops the I/O thread."""
+        self._dap_connected = False
+        if self._io_worker is None:
+            return
+        self._io_close.emit(graceful) # Queued behind any writes still waiting for the worker
+        self._io_write.disconnect(self._io_worker.write)
+        self._io_close.disconnect(self._io_worker.close)
+        # No timeout: close() is bounded by its own waitForDisconnected. The worker has no
+        # parent, so it must stay referenced until its thread has run close() and finished.
+        self._io_thread.wait()
+        self._io_thread.deleteLater()
+        self._io_thread = None
+        self._io_worker = None # Last reference; the worker and its socket are deleted here
 
     def start_session(self, script_path: str):
-        print(f"DebugManager: Attempting to start session for {script_path}")
+        logger.debug("Attempting to start session for %s", script_path)
         self.stop_session() # Clean up any existing session first
 
         self.port = self._find_free_port()
         if self.port == 0:
-            print("DebugManager Error: Could not find a free port.")
+            logger.error("Could not find a free port.")
             self.session_stopped.emit()
             return
 
-        print(f"DebugManager: Found free port: {self.port}")
+        logger.debug("Found free port: %s", self.port)
 
         command = [sys.executable, "-m", "debugpy", "--listen", f"{self.host}:{self.port}", "--wait-for-client", script_path]
 
@@ -448,56 +719,57 @@ class DebugManager(QObject):
         self.debugger_process.readyReadStandardOutput.connect(self._handle_debugger_process_stdout)
         self.debugger_process.readyReadStandardError.connect(self._handle_debugger_process_stderr)
 
-        print(f"DebugManager: Starting process: {' '.join(command)}")
+        logger.debug("Starting process: %s", ' '.join(command))
         self.debugger_process.start(command[0], command[1:])
 
         if not self.debugger_process.waitForStarted(5000): # 5-second timeout
-            print("DebugManager Error: Debugger process failed to start.")
+            logger.error("Debugger process failed to start.")
             # errorOccurred might have already called stop_session, but call it defensively.
             self.stop_session()
             return
 
-        print(f"DebugManager: Debugger process started (PID: {self.debugger_process.processId()}). Connecting DAP client...")
-
-        self.dap_client = QTcpSocket(self)
-        self.dap_client.connected.connect(self._handle_dap_connected)
-        self.dap_client.disconnected.connect(self._handle_dap_disconnected)
-        self.dap_client.readyRead.connect(self._handle_dap_ready_read)
-        # Corrected signal name for QTcpSocket based on typical Qt naming
-        self.dap_client.errorOccurred.connect(self._handle_dap_socket_error)
-
-        self.dap_client.connectToHost(self.host, self.port)
+        logger.debug("Debugger process started (PID: %s). Connecting DAP client...", self.debugger_process.processId())
+
+        # Socket I/O and JSON decoding run on their own thread to keep large responses off the GUI thread
+        self._io_thread = QThread(self)
+        self._io_worker = DapIoWorker(self.host, self.port)
+        self._io_worker.moveToThread(self._io_thread)
+        self._io_worker.connected.connect(self._handle_dap_connected)
+        self._io_worker.disconnected.connect(self._handle_dap_disconnected)
+        self._io_worker.message_received.connect(self._dispatch_dap_message)
+        self._io_worker.socket_error.connect(self._handle_dap_socket_error)
+        self._io_write.connect(self._io_worker.write)
+        self._io_close.connect(self._io_worker.close)
+        self._io_thread.started.connect(self._io_worker.open)
+
+        self._io_thread.start()
         self._connect_timer.start(10000) # 10-second timeout for DAP connection
 
     def stop_session(self):
-        print("DebugManager: Attempting to stop session...")
+        logger.debug("Attempting to stop session...")
         if self._connect_timer.isActive():
             self._connect_timer.stop()
 
         # Try to gracefully disconnect from the debugger
-        if self.dap_client and self.dap_client.isOpen():
-            if self._dap_request_pending_response.get('handshake_complete', False) or \
-               self._dap_request_pending_response.get('initialize_complete', False): # Check if we even started handshake
-                print("DebugManager: Sending disconnect request to DAP server.")
+        if self._io_worker is not None:
+            graceful = self._dap_connected and (
+                'handshake_complete' in self._handshake_flags or
+                'initialize_complete' in self._handshake_flags) # Check if we even started handshake
+            if graceful:
+                logger.debug("Sending disconnect request to DAP server.")
                 # TerminateDebuggee argument might be configurable later
-                self._send_dap_request("disconnect", arguments={"terminateDebuggee": True}, request_seq_to_store="disconnect")
-                # We might want a short wait here or handle the disconnect response,
-                # but for now, we'll proceed to cleanup. If disconnect is successful,
+                self._send_dap_request("disconnect", arguments={"terminateDebuggee": True})
+                # We don't wait for the disconnect response; if it is successful,
                 # debugpy might terminate the process itself.
-            else:
-                # If no handshake, just abort the connection.
-                self.dap_client.abort()
-
-            # It's safer to schedule deletion after the current event loop finishes
-            self.dap_client.deleteLater()
-            self.dap_client = None
+            # If no handshake, just abort the connection.
+            self._shutdown_io(graceful)
 
         if self.debugger_process:
             if self.debugger_process.state() != QProcess.ProcessState.NotRunning:
-                print(f"DebugManager: Terminating debugger process (PID: {self.debugger_process.processId()}).")
+                logger.debug("Terminating debugger process (PID: %s).", self.debugger_process.processId())
                 self.debugger_process.terminate()
                 if not self.debugger_process.waitForFinished(2000): # Shorter timeout after disconnect attempt
-                    print("DebugManager: Debugger process did not terminate gracefully after disconnect, killing.")
+                    logger.debug("Debugger process did not terminate gracefully after disconnect, killing.")
                     self.debugger_process.kill()
             self.debugger_process.deleteLater()
             self.debugger_process = None
@@ -507,57 +779,60 @@ class DebugManager(QObject):
         self._active_thread_id = None
         self._current_stop_reason = ""
         self._call_stack_data.clear()
-        self._variables_data.clear()
-        self._scopes_references.clear()
+        self._variables = VariablesView()
+        self._deferred_scopes.clear()
+        self._scope_variable_requests.clear()
+        self._child_variable_requests.clear()
         self._pending_variable_requests = 0
         self._pending_breakpoint_sync_count = 0
-        self._buffer = bytearray()
+        self._sent_breakpoints.clear() # The next session's adapter starts with none
         self._dap_seq = 1 # Reset sequence for next session
         self.port = 0 # Reset port
 
-        # Clear any pending response flags, including handshake stages
-        self._dap_request_pending_response.clear()
+        # Clear any pending responses and handshake stages
+        self._pending_requests.clear()
+        self._handshake_flags.clear()
 
         self.session_stopped.emit()
-        print("DebugManager: Session stop finalized and signal emitted.")
+        logger.debug("Session stop finalized and signal emitted.")
 
 
     def continue_execution(self, thread_id=None):
-        if not self.dap_client or not self.dap_client.isOpen() or self._active_thread_id is None:
-            print("DebugManager Warning: Cannot continue. DAP client not connected or not paused.")
+        if not self._dap_connected or self._active_thread_id is None:
+            logger.warning("Cannot continue. DAP client not connected or not paused.")
             return
         target_thread_id = thread_id if thread_id is not None else self._active_thread_id
-        print(f"DebugManager: Sending 'continue' request for thread {target_thread_id}.")
-        self._send_dap_request("continue", arguments={"threadId": target_thread_id}, request_seq_to_store="continue")
+        logger.debug("Sending 'continue' request for thread %s.", target_thread_id)
+        self._send_dap_request("continue", arguments={"threadId": target_thread_id})
         # DAP server will send a 'continued' event if successful.
 
     def step_over(self, thread_id=None):
-        if not self.dap_client or not self.dap_client.isOpen() or self._active_thread_id is None:
-            print("DebugManager Warning: Cannot step over. DAP client not connected or not paused.")
+        if not self._dap_connected or self._active_thread_id is None:
+            logger.warning("Cannot step over. DAP client not connected or not paused.")
             return
         target_thread_id = thread_id if thread_id is not None else self._active_thread_id
-        print(f"DebugManager: Sending 'next' (step over) request for thread {target_thread_id}.")
-        self._send_dap_request("next", arguments={"threadId": target_thread_id}, request_seq_to_store="next")
+        logger.debug("Sending 'next' (step over) request for thread %s.", target_thread_id)
+        self._send_dap_request("next", arguments={"threadId": target_thread_id})
 
     def step_into(self, thread_id=None):
-        if not self.dap_client or not self.dap_client.isOpen() or self._active_thread_id is None:
-            print("DebugManager Warning: Cannot step into. DAP client not connected or not paused.")
+        if not self._dap_connected or self._active_thread_id is None:
+            logger.warning("Cannot step into. DAP client not connected or not paused.")
             return
         target_thread_id = thread_id if thread_id is not None else self._active_thread_id
-        print(f"DebugManager: Sending 'stepIn' request for thread {target_thread_id}.")
-        self._send_dap_request("stepIn", arguments={"threadId": target_thread_id}, request_seq_to_store="stepIn")
+        logger.debug("Sending 'stepIn' request for thread %s.", target_thread_id)
+        self._send_dap_request("stepIn", arguments={"threadId": target_thread_id})
 
     def step_out(self, thread_id=None):
-        if not self.dap_client or not self.dap_client.isOpen() or self._active_thread_id is None:
-            print("DebugManager Warning: Cannot step out. DAP client not connected or not paused.")
+        if not self._dap_connected or self._active_thread_id is None:
+            logger.warning("Cannot step out. DAP client not connected or not paused.")
             return
         target_thread_id = thread_id if thread_id is not None else self._active_thread_id
-        print(f"DebugManager: Sending 'stepOut' request for thread {target_thread_id}.")
-        self._send_dap_request("stepOut", arguments={"threadId": target_thread_id}, request_seq_to_store="stepOut")
+        logger.debug("Sending 'stepOut' request for thread %s.", target_thread_id)
+        self._send_dap_request("stepOut", arguments={"threadId": target_thread_id})
 
-    def set_breakpoints_on_adapter(self, file_path: str, lines: list): # lines is a list here
-        if not self.dap_client or not self.dap_client.isOpen():
-            print("DebugManager Error: DAP client not connected. Cannot set breakpoints on adapter.")
+    def set_breakpoints_on_adapter(self, file_path: str, lines: tuple[int, ...]): # Sorted, unique lines
+        if not self._dap_connected:
+            logger.error("DAP client not connected. Cannot set breakpoints on adapter.")
             return
 
         # It's generally okay to send breakpoints even if handshake isn't "fully" complete,
@@ -565,28 +840,29 @@ class DebugManager(QObject):
         # Adapters usually queue these if "launch/attach" isn't done yet.
         # However, the _synchronize_all_breakpoints_on_startup handles initial ones.
         # This method is for dynamic updates.
-        if not self._dap_request_pending_response.get('initialize_complete', False):
-             print("DebugManager Warning: DAP 'initialize' not yet complete. Breakpoint setting might be queued by adapter or fail.")
+        if 'initialize_complete' not in self._handshake_flags:
+             logger.warning("DAP 'initialize' not yet complete. Breakpoint setting might be queued by adapter or fail.")
         # No longer strictly checking for 'handshake_complete' to allow more flexibility,
         # especially if user modifies breakpoints before 'configurationDone' response.
 
-        bp_args = {
-            "source": {"path": file_path},
-            "breakpoints": [{"line": l} for l in sorted(list(lines))] # Ensure it's a list of unique, sorted lines
-        }
-        print(f"DebugManager: Sending dynamic setBreakpoints for {file_path} with lines: {lines}")
-        self._send_dap_request("setBreakpoints", arguments=bp_args, request_seq_to_store=f"setBreakpoints_dynamic_{file_path}")
+        bp_args = self._breakpoint_args(file_path, lines)
+        if bp_args is None: # Adapter already has these breakpoints
+            return
+        logger.debug("Sending dynamic setBreakpoints for %s with lines: %s", file_path, lines)
+        self._send_dap_request("setBreakpoints", arguments=bp_args)
 
 
     def update_internal_breakpoints(self, file_path: str, lines: set):
-        if not lines:
+        # Sorted once here, on change, so syncing with the adapter never has to sort
+        sorted_lines = tuple(sorted(lines))
+        if not sorted_lines:
             if file_path in self.breakpoints:
                 del self.breakpoints[file_path]
         else:
-            self.breakpoints[file_path] = set(lines)
+            self.breakpoints[file_path] = sorted_lines
 
-        if self.dap_client and self.dap_client.isOpen() and self._dap_request_pending_response.get('handshake_complete'):
-             self.set_breakpoints_on_adapter(file_path, list(lines))
+        if self._dap_connected and 'handshake_complete' in self._handshake_flags:
+             self.set_breakpoints_on_adapter(file_path, sorted_lines)
 
 
 if __name__ == '__main__':
@@ -1,5 +1,6 @@
 import os
-from PySide6.QtCore import QObject, Signal, Slot
+from PySide6.QtCore import QObject, Signal, Slot, QThreadPool
+from worker_threads import SaveFileWorker
 
 class FileManager(QObject):
     # Signals
@@ -36,27 +37,40 @@ class FileManager(QObject):
             self.file_open_error.emit(path, f"Could not open file {path}: {e}")
 
     @Slot(object, str, str) # widget_ref, content, path
-    def save_file(self, widget_ref, content, path):
+    def save_file(self, widget_ref, content, path, blocking=False) -> bool:
+        '''
+        Writes content to path on the global thread pool; file_saved or
+        file_save_error follows once the write is done. With blocking, the write
+        happens right here and the return value says whether it succeeded.
+        '''
         if not path:
             self.file_save_error.emit(widget_ref, path or "", "File path cannot be None for saving.")
-            return
-
-        try:
-            dir_name = os.path.dirname(path)
-            if dir_name: # Ensure directory exists only if path includes a directory
-                os.makedirs(dir_name, exist_ok=True)
-
-            with open(path, 'w', encoding='utf-8') as f:
-                f.write(content)
-
-            initial_dirty_state = self.open_files_data.get(path, {}).get("is_dirty", False)
-            self.open_files_data[path] = {"is_dirty": False, "content_hash": hash(content)}
-            self.file_saved.emit(widget_ref, path, content)
-            if initial_dirty_state:
-                self.dirty_status_changed.emit(path, False)
-
-        except Exception as e:
-            self.file_save_error.emit(widget_ref, path, f"Could not save file {path}: {e}")
+            return False
+
+        if blocking:
+            try:
+                SaveFileWorker.write(content, path, SaveFileWorker.next_generation())
+            except Exception as e:
+                self.file_save_error.emit(widget_ref, path, f"Could not save file {path}: {e}")
+                return False
+            self._mark_saved(widget_ref, path, content)
+            return True
+
+        worker = SaveFileWorker(widget_ref, content, path)
+        worker.signals.finished.connect(self._mark_saved)
+        worker.signals.error.connect(self.file_save_error)
+        QThreadPool.globalInstance().start(worker)
+        return True
+
+    @Slot(object, str, str) # widget_ref, path, content
+    def _mark_saved(self, widget_ref, path, content):
+        '''Records content as the clean state of path once it is on disk.'''
+        initial_dirty_state = self.open_files_data.get(path, {}).get("is_dirty", False)
+        self.open_files_data[path] = {"is_dirty": False, "content_hash": hash(content)}
+        if initial_dirty_state:
+            self.dirty_status_changed.emit(path, False)
+        # Last, so a receiver can mark the file dirty again if it was edited during the write
+        self.file_saved.emit(widget_ref, path, content)
 
     @Slot(str, str) # path, current_editor_content
     def update_file_content_changed(self, path, current_editor_content):
@@ -1,22 +1,48 @@
-from PySide6.QtWidgets import QMainWindow, QTabWidget, QStatusBar, QDockWidget, QApplication, QWidget, QVBoxLayout, QMenuBar, QMenu, QFileDialog, QLabel, QToolBar, QInputDialog, QMessageBox, QLineEdit, QPushButton, QToolButton, QComboBox, QPlainTextEdit, QStyle, QTreeWidget, QTreeWidgetItem, QListWidget, QListWidgetItem
+from PySide6.QtWidgets import QMainWindow, QTabWidget, QStatusBar, QDockWidget, QApplication, QWidget, QVBoxLayout, QMenuBar, QMenu, QFileDialog, QLabel, QToolBar, QInputDialog, QMessageBox, QLineEdit, QPushButton, QToolButton, QComboBox, QPlainTextEdit, QStyle, QTreeWidget, QTreeWidgetItem, QTreeWidgetItemIterator, QListWidget, QListWidgetItem
 from PySide6.QtGui import QAction, QIcon, QTextCharFormat, QColor, QTextCursor, QActionGroup, QFont
-from PySide6.QtCore import Qt, Signal, Slot, QPoint, QModelIndex, QThreadPool, QStandardPaths, QObject, QProcess
+from PySide6.QtCore import Qt, Signal, Slot, QPoint, QModelIndex, QThreadPool, QStandardPaths, QObject, QProcess, QByteArray
 from file_explorer import FileExplorer
 from code_editor import CodeEditor
-from debug_manager import DebugManager # Import DebugManager
+from debug_manager import DebugManager, VariablesView # Import DebugManager
 from interactive_terminal import InteractiveTerminal # Import the new interactive terminal
 from network_manager import NetworkManager # Import NetworkManager
-from connection_dialog import ConnectionDialog # Import ConnectionDialog
 from ai_controller import AIController # Import AIController
 from file_manager import FileManager
 from session_manager import SessionManager
 from process_manager import ProcessManager
+from worker_threads import BlackFormatterWorker, FormatSyntaxError, LANGUAGE_POOL
 import tempfile
 import os
 import sys
 import shutil # For rmtree
 import json # Import json for structured messages
-import black # Import black for synchronous formatting
+from enum import IntEnum
+from types import MappingProxyType
+
+
+class Language(IntEnum):
+    """Languages known to the editor; values index LANGUAGE_NAMES and MainWindow.RUNNERS."""
+    PLAIN_TEXT = 0
+    PYTHON = 1
+    JAVASCRIPT = 2
+    CPP = 3
+    C = 4
+    JAVA = 5
+    HTML = 6
+
+LANGUAGE_NAMES = ("Plain Text", "Python", "JavaScript", "C++", "C", "Java", "HTML")
+
+
+class ControlEvent(IntEnum):
+    """Events driving the editing-control hand-off between host and client."""
+    REQUEST = 1   # Client asks the host for control
+    GRANT = 2     # Host grants a pending request
+    DECLINE = 3   # Host declines a pending request
+    GRANTED = 4   # Client is told control was granted
+    DECLINED = 5  # Client is told the request was declined
+    REVOKED = 6   # Client is told control was revoked
+    RECLAIM = 7   # Host takes control back
+
 
 class MainWindow(QMainWindow):
     def __init__(self, initial_path=None):
@@ -37,6 +63,7 @@ class MainWindow(QMainWindow):
         # State variables for collaborative editing
         self.is_host = False
         self.has_control = False # True if this instance has the editing token
+        self._control_request_pending = False # True while a client's control request awaits the host's answer
         # self.tab_data_map = {} # Map to store tab-specific data (e.g., file paths) - REMOVED
         self.recent_projects = [] # Initialize recent projects list
 
@@ -48,6 +75,21 @@ class MainWindow(QMainWindow):
         # For mapping editor widgets to paths and vice-versa
         self.editor_to_path = {}
         self.path_to_editor = {}
+        # Running background black formats, editor -> BlackFormatterWorker; holding the
+        # worker keeps its signals (and the lambdas connected to them) alive until it reports
+        self._black_workers = {}
+        # editor -> path of a save requested while its format was running; written once it is done
+        self._queued_saves = {}
+        # editor -> count of blocking saves; a background format started before the
+        # latest one is stale, and its result is dropped rather than applied or written
+        self._format_generations = {}
+        # editor -> hash() of the text it last got back from black, so saving an
+        # unchanged, already formatted buffer does not run black at all
+        self._formatted_hashes = {}
+
+        # Numbers N of the open "Untitled-N" tabs, and the lowest N that may be free
+        self._used_untitled = set()
+        self._next_untitled = 1
 
         self.current_run_mode = "Run" # Initial run mode
         self.setup_status_bar() # Initialize status bar labels first
@@ -58,6 +100,9 @@ class MainWindow(QMainWindow):
         self.debug_manager.session_stopped.connect(self._on_debug_session_stopped)
         self.debug_manager.paused.connect(self._on_debugger_paused)
         self.debug_manager.resumed.connect(self._on_debugger_resumed)
+        self.debug_manager.scope_variables_loaded.connect(self._on_scope_variables_loaded)
+        self.debug_manager.variable_children_loaded.connect(self._on_variable_children_loaded)
+        self.debug_manager.child_output.connect(self._on_debugger_child_output)
         self.setup_debugger_toolbar() # Add this line
         self.setup_ui()
         self.setup_menu()
@@ -212,6 +257,7 @@ class MainWindow(QMainWindow):
         self.variables_panel.setHeaderLabels(["Variable", "Value", "Type"])
         locals_item = QTreeWidgetItem(self.variables_panel, ["Locals"])
         self.variables_panel.addTopLevelItem(locals_item)
+        self.variables_panel.itemExpanded.connect(self._on_variables_item_expanded)
         debugger_layout.addWidget(self.variables_panel)
 
         # Call Stack Panel
@@ -470,35 +516,47 @@ class MainWindow(QMainWindow):
         self.network_manager.peer_connected.connect(self.on_peer_connected)
         self.network_manager.peer_disconnected.connect(self.on_peer_disconnected)
         
-        # New signals for control management
-        self.network_manager.control_request_received.connect(self.on_control_request_received)
-        self.network_manager.control_granted.connect(self.on_control_granted)
-        self.network_manager.control_revoked.connect(self.on_control_revoked)
-        
         # New signals for control management
         self.network_manager.control_request_received.connect(self.on_control_request_received)
         self.network_manager.control_granted.connect(self.on_control_granted)
         self.network_manager.control_declined.connect(self.on_control_declined) # Connect new signal
         self.network_manager.control_revoked.connect(self.on_control_revoked)
 
-    EXTENSION_TO_LANGUAGE = {
-        ".py": "Python",
-        ".js": "JavaScript",
-        ".cpp": "C++",
-        ".cxx": "C++",
-        ".c": "C",
-        ".java": "Java",
-        ".html": "HTML",
-        ".txt": "Plain Text"
+    EXTENSION_TO_LANGUAGE_ID = {
+        ".py": Language.PYTHON,
+        ".js": Language.JAVASCRIPT,
+        ".cpp": Language.CPP,
+        ".cxx": Language.CPP,
+        ".c": Language.C,
+        ".java": Language.JAVA,
+        ".html": Language.HTML,
+        ".txt": Language.PLAIN_TEXT
     }
-
-    RUNNER_CONFIG = {
-        "Python": ["python", "-u", "{file}"],
+    # Read-only name view kept for the language selector and older callers
+    EXTENSION_TO_LANGUAGE = MappingProxyType({ext: LANGUAGE_NAMES[lang] for ext, lang in EXTENSION_TO_LANGUAGE_ID.items()})
+
+    # (CodeEditor signal, MainWindow slot) pairs wired up for every editor tab
+    EDITOR_SIGNAL_SLOTS = (
+        ("textChanged", "on_text_editor_changed"),
+        ("cursor_position_changed_signal", "_update_cursor_position_label"), # Keeps the Ln/Col label current
+        ("language_changed_signal", "_update_language_label"),
+        ("control_reclaim_requested", "on_host_reclaim_control"),
+        ("breakpoint_toggled", "_handle_breakpoint_toggled"),
+    )
+
+    # Run command templates indexed by Language; None where no runner is configured.
+    RUNNERS = (
+        None,                           # PLAIN_TEXT
+        ["python", "-u", "{file}"],     # PYTHON
+        ["node", "{file}"],             # JAVASCRIPT
         # Simplified C++ command: just compile. Running the output file would be a separate step.
         # This is a temporary adjustment due to ProcessManager not handling '&&' or shell chains directly.
-        "C++": ["g++", "{file}", "-o", "{output_file}"],
-        "JavaScript": ["node", "{file}"]
-    }
+        ["g++", "{file}", "-o", "{output_file}"], # CPP
+        None,                           # C
+        None,                           # JAVA
+        None,                           # HTML
+    )
+    RUNNER_CONFIG = MappingProxyType({LANGUAGE_NAMES[lang]: cmd for lang, cmd in zip(Language, RUNNERS) if cmd})
 
     def _update_status_bar_and_language_selector_on_tab_change(self, index):
         # Disconnect from previous editor's undo stack signals if any
@@ -612,7 +670,7 @@ class MainWindow(QMainWindow):
                 self.is_updating_from_network = True
                 current_cursor_pos = current_editor.textCursor().position()
                 print(f"LOG: MainWindow.on_network_data_received - Setting text: {content[:50]}...")
-                current_editor.setPlainText(content)
+                current_editor.set_plain_text_bulk(content)
                 cursor = current_editor.textCursor()
                 cursor.setPosition(current_cursor_pos)
                 current_editor.setTextCursor(cursor)
@@ -641,11 +699,13 @@ class MainWindow(QMainWindow):
         self.stop_session_action.setEnabled(False)
         self.is_host = False
         self.has_control = False
+        self._control_request_pending = False
         self.update_ui_for_control_state() # Reset UI after disconnection
         print(f"LOG: on_peer_disconnected - is_host={self.is_host}, has_control={self.has_control}")
 
     @Slot()
     def start_hosting_session(self):
+        from connection_dialog import ConnectionDialog # Only needed once a session is started
         ip, port = ConnectionDialog.get_details(self)
         if ip and port:
             if self.network_manager.start_hosting(port):
@@ -662,6 +722,7 @@ class MainWindow(QMainWindow):
 
     @Slot()
     def connect_to_host_session(self):
+        from connection_dialog import ConnectionDialog # Only needed once a session is started
         ip, port = ConnectionDialog.get_details(self)
         if ip and port:
             self.network_manager.connect_to_host(ip, port)
@@ -671,6 +732,7 @@ class MainWindow(QMainWindow):
             self.stop_session_action.setEnabled(True)
             self.is_host = False
             self.has_control = False # Client starts without control
+            self._control_request_pending = False
             self.update_ui_for_control_state()
             print(f"LOG: connect_to_host_session - is_host={self.is_host}, has_control={self.has_control}")
 
@@ -683,6 +745,7 @@ class MainWindow(QMainWindow):
         self.stop_session_action.setEnabled(False)
         self.is_host = False
         self.has_control = False
+        self._control_request_pending = False
         self.update_ui_for_control_state() # Reset UI after session stop
         print(f"LOG: stop_current_session - is_host={self.is_host}, has_control={self.has_control}")
 
@@ -709,7 +772,7 @@ class MainWindow(QMainWindow):
             self.status_bar.showMessage("No active editor to run.", 3000)
             return
 
-        if not self.save_current_file():
+        if not self.save_current_file(blocking=True): # The runner reads the file from disk
             self.status_bar.showMessage("Save operation cancelled or failed. Run aborted.", 3000)
             return
 
@@ -719,14 +782,14 @@ class MainWindow(QMainWindow):
             return
 
         _, extension = os.path.splitext(file_path)
-        language_name = self.EXTENSION_TO_LANGUAGE.get(extension.lower())
-        if not language_name:
+        language = self.EXTENSION_TO_LANGUAGE_ID.get(extension.lower())
+        if language is None:
             QMessageBox.warning(self, "Execution Error", f"No language is configured for file type '{extension}'.")
             return
 
-        command_template_list = self.RUNNER_CONFIG.get(language_name)
+        command_template_list = self.RUNNERS[language]
         if not command_template_list:
-            QMessageBox.warning(self, "Execution Error", f"No 'run' command is configured for the language '{language_name}'.")
+            QMessageBox.warning(self, "Execution Error", f"No 'run' command is configured for the language '{LANGUAGE_NAMES[language]}'.")
             return
 
         working_dir = os.path.dirname(file_path) or os.getcwd()
@@ -774,7 +837,7 @@ class MainWindow(QMainWindow):
 
         # Update "Request Control" button state
         if self.network_manager.is_connected() and not self.is_host:
-            self.request_control_button.setEnabled(not self.has_control)
+            self.request_control_button.setEnabled(not self.has_control and not self._control_request_pending)
         else:
             self.request_control_button.setEnabled(False) # Only client can request control
 
@@ -782,13 +845,39 @@ class MainWindow(QMainWindow):
         self.update_editor_read_only_state()
         print(f"LOG: update_ui_for_control_state - is_host={self.is_host}, has_control={self.has_control}, editor_read_only={self._get_current_code_editor().isReadOnly() if self._get_current_code_editor() else 'N/A'}")
 
+    # (event, is_host, has_control) -> (new has_control, wire message, status message, status timeout)
+    CONTROL_TRANSITIONS = {
+        (ControlEvent.REQUEST, False, False): (False, 'REQ_CONTROL', "Requesting control...", 0),
+        (ControlEvent.GRANT, True, True): (False, 'GRANT_CONTROL', "Control granted to client.", 0),
+        (ControlEvent.DECLINE, True, True): (True, 'DECLINE_CONTROL', "Control request declined.", 0),
+        (ControlEvent.GRANTED, False, False): (True, None, "You have been granted editing control.", 0),
+        (ControlEvent.GRANTED, False, True): (True, None, "You have been granted editing control.", 0),
+        (ControlEvent.DECLINED, False, False): (False, None, "Host declined the request.", 3000),
+        (ControlEvent.REVOKED, False, False): (False, None, "Editing control has been revoked.", 0),
+        (ControlEvent.REVOKED, False, True): (False, None, "Editing control has been revoked.", 0),
+        (ControlEvent.RECLAIM, True, False): (True, 'REVOKE_CONTROL', "You have reclaimed editing control.", 0),
+    }
+
+    def _apply_control_event(self, event):
+        """Applies a control transition from CONTROL_TRANSITIONS; events invalid for the current state are ignored."""
+        transition = self.CONTROL_TRANSITIONS.get((event, self.is_host, self.has_control))
+        if transition is None:
+            return
+        new_has_control, wire_message, status_message, timeout = transition
+        if wire_message and not self.network_manager.is_connected():
+            return
+
+        self.has_control = new_has_control
+        self._control_request_pending = event == ControlEvent.REQUEST
+        if wire_message:
+            self.network_manager.send_data(wire_message)
+        self.update_ui_for_control_state()
+        self.status_bar.showMessage(status_message, timeout)
+        print(f"LOG: {event.name} - is_host={self.is_host}, has_control={self.has_control}")
+
     @Slot()
     def request_control(self):
-        if not self.is_host and not self.has_control and self.network_manager.is_connected():
-            self.network_manager.send_data('REQ_CONTROL')
-            self.status_bar.showMessage("Requesting control...")
-            self.request_control_button.setEnabled(False) # Disable button after request
-            print(f"LOG: request_control - is_host={self.is_host}, has_control={self.has_control}")
+        self._apply_control_event(ControlEvent.REQUEST)
 
     @Slot()
     def on_control_request_received(self):
@@ -796,70 +885,51 @@ class MainWindow(QMainWindow):
             reply = QMessageBox.question(self, "Control Request",
                                          "The client has requested editing control. Grant control?",
                                          QMessageBox.Yes | QMessageBox.No)
-            if reply == QMessageBox.Yes:
-                self.network_manager.send_data('GRANT_CONTROL')
-                self.has_control = False
-                self.update_ui_for_control_state()
-                self.status_bar.showMessage("Control granted to client.")
-            else:
-                self.network_manager.send_data('DECLINE_CONTROL')
-                self.status_bar.showMessage("Control request declined.")
+            self._apply_control_event(ControlEvent.GRANT if reply == QMessageBox.Yes else ControlEvent.DECLINE)
 
     @Slot()
     def on_control_granted(self):
-        if not self.is_host: # Only client receives this
-            self.has_control = True
-            self.update_ui_for_control_state()
-            self.status_bar.showMessage("You have been granted editing control.")
-            print(f"LOG: on_control_granted - is_host={self.is_host}, has_control={self.has_control}")
+        self._apply_control_event(ControlEvent.GRANTED)
 
     @Slot()
     def on_control_declined(self):
-        if not self.is_host: # Only client receives this
-            self.status_bar.showMessage("Host declined the request.", 3000) # Show for 3 seconds
-            self.request_control_button.setEnabled(True) # Re-enable button
+        self._apply_control_event(ControlEvent.DECLINED)
 
     @Slot()
     def on_control_revoked(self):
-        if not self.is_host: # Only client receives this
-            self.has_control = False
-            self.update_ui_for_control_state()
-            self.status_bar.showMessage("Editing control has been revoked.")
-            print(f"LOG: on_control_revoked - is_host={self.is_host}, has_control={self.has_control}")
+        self._apply_control_event(ControlEvent.REVOKED)
 
     @Slot()
     def on_host_reclaim_control(self):
-        if self.is_host and not self.has_control: # Host reclaims control
-            self.has_control = True
-            self.update_ui_for_control_state()
-            self.network_manager.send_data('REVOKE_CONTROL')
-            self.status_bar.showMessage("You have reclaimed editing control.")
-            print(f"LOG: on_host_reclaim_control - is_host={self.is_host}, has_control={self.has_control}")
+        self._apply_control_event(ControlEvent.RECLAIM)
 
     def _get_next_untitled_name(self):
-        count = 1
-        while True:
-            name = f"Untitled-{count}"
-            # Check if this name is already used by a placeholder path
-            is_used = False
-            for path in self.path_to_editor.keys():
-                if path.startswith("untitled:") and os.path.basename(path) == name: # Check basename for "untitled:Untitled-N"
-                    is_used = True
-                    break
-            if not is_used:
-                return name
+        count = self._next_untitled
+        while count in self._used_untitled:
             count += 1
+        self._used_untitled.add(count)
+        self._next_untitled = count + 1
+        return f"Untitled-{count}"
+
+    def _release_untitled_name(self, path: str):
+        """Frees the number of an "untitled:Untitled-N" placeholder for reuse."""
+        if not path.startswith("untitled:Untitled-"):
+            return
+        try:
+            count = int(path[len("untitled:Untitled-"):])
+        except ValueError:
+            return
+        self._used_untitled.discard(count)
+        self._next_untitled = min(self._next_untitled, count)
 
     def open_new_tab(self, file_path=None):
         if file_path:
             # Check if already open via path_to_editor to avoid duplicate signal emission if already there
             if file_path in self.path_to_editor:
                 editor = self.path_to_editor[file_path]
-                # Bring tab to front
-                for i in range(self.tab_widget.count()):
-                    if self.tab_widget.widget(i) == editor:
-                        self.tab_widget.setCurrentIndex(i)
-                        return
+                if self.tab_widget.indexOf(editor) != -1:
+                    self.tab_widget.setCurrentWidget(editor) # Bring tab to front
+                    return
             self.file_manager.open_file(file_path)
         else:
             # Handle new, untitled file (not tracked by FileManager until first save)
@@ -877,11 +947,7 @@ class MainWindow(QMainWindow):
             self.path_to_editor[untitled_path_placeholder] = editor
             editor.file_path = untitled_path_placeholder # For consistency with editor's own tracking
 
-            # Connect signals for this new editor
-            editor.textChanged.connect(self.on_text_editor_changed)
-            editor.cursor_position_changed_signal.connect(self._update_cursor_position_label)
-            editor.language_changed_signal.connect(self._update_language_label)
-            editor.control_reclaim_requested.connect(self.on_host_reclaim_control)
+            self._connect_editor_signals(editor)
 
             self._update_status_bar_and_language_selector_on_tab_change(index)
             self.update_editor_read_only_state()
@@ -890,32 +956,36 @@ class MainWindow(QMainWindow):
             # For a brand new untitled tab, it should show as dirty.
             self._handle_dirty_status_changed(untitled_path_placeholder, True)
 
-            # Connect breakpoint toggled signal for new untitled editor
-            editor.breakpoint_toggled.connect(self._handle_breakpoint_toggled)
+    def _connect_editor_signals(self, editor: CodeEditor):
+        """Connects a newly created tab's editor to the window's slots."""
+        for signal_name, slot_name in self.EDITOR_SIGNAL_SLOTS:
+            getattr(editor, signal_name).connect(getattr(self, slot_name))
+
+    def _disconnect_editor_signals(self, editor: CodeEditor):
+        """Undoes _connect_editor_signals for a tab being closed."""
+        for signal_name, slot_name in self.EDITOR_SIGNAL_SLOTS:
+            try:
+                # Only our slot; the editor's own forwarding stays intact
+                getattr(editor, signal_name).disconnect(getattr(self, slot_name))
+            except (RuntimeError, TypeError): # Already disconnected
+                pass
 
 
     @Slot(str, str) # path, content
     def _handle_file_opened(self, path, content):
         if path in self.path_to_editor:
             editor = self.path_to_editor[path]
-            if editor in self.editor_to_path:
-                for i in range(self.tab_widget.count()):
-                    if self.tab_widget.widget(i) == editor:
-                        self.tab_widget.setCurrentIndex(i)
-                        # Potentially update content if it changed externally, though FileManager handles initial load
-                        # editor.setPlainText(content) # Consider if this is needed or if FM ensures latest
-                        return
+            if editor in self.editor_to_path and self.tab_widget.indexOf(editor) != -1:
+                self.tab_widget.setCurrentWidget(editor)
+                # Potentially update content if it changed externally, though FileManager handles initial load
+                # editor.setPlainText(content) # Consider if this is needed or if FM ensures latest
+                return
             print(f"Warning: Path {path} in path_to_editor but editor not found in tabs or editor_to_path.")
 
         editor = CodeEditor(self)
-        editor.setPlainText(content)
+        editor.set_plain_text_bulk(content) # Highlighter detached; large files are highlighted once, deferred
         editor.file_path = path # Important: Set file_path on editor for its own reference
 
-        editor.cursorPositionChanged.connect(lambda: self._update_cursor_position_label(
-            editor.textCursor().blockNumber() + 1,
-            editor.textCursor().columnNumber() + 1
-        ))
-
         file_extension = os.path.splitext(path)[1].lower()
         language = self.EXTENSION_TO_LANGUAGE.get(file_extension, "Plain Text")
         editor.set_file_path_and_update_language(path)
@@ -928,11 +998,7 @@ class MainWindow(QMainWindow):
         self.editor_to_path[editor] = path
         self.path_to_editor[path] = editor
 
-        editor.textChanged.connect(self.on_text_editor_changed)
-        editor.cursor_position_changed_signal.connect(self._update_cursor_position_label)
-        editor.language_changed_signal.connect(self._update_language_label)
-        editor.control_reclaim_requested.connect(self.on_host_reclaim_control)
-        editor.breakpoint_toggled.connect(self._handle_breakpoint_toggled) # Connect signal
+        self._connect_editor_signals(editor)
 
         self._update_status_bar_and_language_selector_on_tab_change(new_tab_index)
         self.update_editor_read_only_state()
@@ -972,16 +1038,10 @@ class MainWindow(QMainWindow):
         # Trigger gutter re-render on the current editor's gutter
         editor.gutter.update_breakpoints_display(self.active_breakpoints.get(file_path, set()))
 
-        # Also update DebugManager's internal list and the adapter if a session is active
+        # Also update DebugManager's internal list; it forwards them to the adapter if a session is active
         lines_for_file = self.active_breakpoints.get(file_path, set())
         self.debug_manager.update_internal_breakpoints(file_path, lines_for_file)
 
-        # Check if DAP client is connected and handshake is complete before sending to adapter
-        if self.debug_manager.dap_client and \
-           self.debug_manager.dap_client.isOpen() and \
-           self.debug_manager._dap_request_pending_response.get('handshake_complete', False):
-            self.debug_manager.set_breakpoints_on_adapter(file_path, list(lines_for_file))
-
 
     @Slot(str, str) # path, error_message
     def _handle_file_open_error(self, path, error_message):
@@ -1043,17 +1103,6 @@ class MainWindow(QMainWindow):
 
         widget = self.tab_widget.widget(index_to_close)
         if widget is not None:
-            # Disconnect signals first
-            if isinstance(widget, CodeEditor):
-                try:
-                    widget.textChanged.disconnect(self.on_text_editor_changed)
-                    widget.control_reclaim_requested.disconnect(self.on_host_reclaim_control)
-                    # Attempt to disconnect other signals if they were connected
-                    widget.cursor_position_changed_signal.disconnect(self._update_cursor_position_label)
-                    widget.language_changed_signal.disconnect(self._update_language_label)
-                except RuntimeError: # Signal already disconnected
-                    pass
-            
             path_for_editor = self.editor_to_path.get(widget)
             proceed_with_close = True # Assume we can close unless dirty check says otherwise
 
@@ -1076,19 +1125,25 @@ class MainWindow(QMainWindow):
                     if reply == QMessageBox.Cancel:
                         proceed_with_close = False
                     elif reply == QMessageBox.Save:
-                        if not self._save_file(index_to_close): # Attempt to save
+                        if not self._save_file(index_to_close, blocking=True): # Attempt to save
                             # User cancelled the save dialog
                             proceed_with_close = False
                     elif reply == QMessageBox.Discard:
                         proceed_with_close = True # Discard changes, proceed to close
 
             if not proceed_with_close:
-                return # Stop the tab closing process
+                return # Stop the tab closing process; the editor stays wired up
 
             # If we are here, either file was not dirty, or user chose Discard, or Save was successful.
+            if isinstance(widget, CodeEditor):
+                self._disconnect_editor_signals(widget)
             if path_for_editor:
                 if widget in self.editor_to_path:
                     del self.editor_to_path[widget]
+                self._formatted_hashes.pop(widget, None)
+                self._queued_saves.pop(widget, None)
+                self._format_generations.pop(widget, None)
+                self._release_untitled_name(path_for_editor)
                 if path_for_editor in self.path_to_editor:
                     del self.path_to_editor[path_for_editor]
 
@@ -1127,18 +1182,17 @@ class MainWindow(QMainWindow):
         full_path = os.path.join(target_directory, file_name)
 
         # 3. File Creation and Error Handling
-        if os.path.exists(full_path):
-            QMessageBox.warning(self, "File Exists", "A file or folder with this name already exists.")
-            return
-
         try:
-            with open(full_path, 'w', encoding='utf-8') as f:
+            # 'x' creates exclusively, so an existing file or folder is never truncated
+            with open(full_path, 'x', encoding='utf-8') as f:
                 pass # Create an empty file
             
             # 4. Post-Creation Workflow
             self.open_new_tab(full_path) # Open the new file in the editor
             self.status_bar.showMessage(f"Created new file: {full_path}", 3000)
 
+        except FileExistsError:
+            QMessageBox.warning(self, "File Exists", "A file or folder with this name already exists.")
         except OSError as e:
             QMessageBox.critical(self, "Error Creating File", f"Failed to create file '{file_name}': {e}")
         except Exception as e:
@@ -1155,12 +1209,12 @@ class MainWindow(QMainWindow):
             self.initialize_project(selected_file) # Initialize project with the selected file
             self.open_new_tab(selected_file)
 
-    def save_current_file(self):
+    def save_current_file(self, *, blocking: bool = False):
         current_index = self.tab_widget.currentIndex()
         if current_index == -1:
             self.status_bar.showMessage("No active editor to save.")
             return False
-        return self._save_file(current_index)
+        return self._save_file(current_index, blocking=blocking)
 
     def save_current_file_as(self):
         current_index = self.tab_widget.currentIndex()
@@ -1169,76 +1223,13 @@ class MainWindow(QMainWindow):
             return False
         return self._save_file(current_index, save_as=True)
 
-    def _save_file(self, index: int, save_as: bool = False) -> bool:
-        editor = self.tab_widget.widget(index)
-        if not isinstance(editor, CodeEditor):
-            return False
-
-        current_path_placeholder = self.editor_to_path.get(editor)
-        content_to_save = editor.toPlainText()
-        path_to_save = None
-
-        is_untitled_file = current_path_placeholder is not None and current_path_placeholder.startswith("untitled:")
-
-        if save_as or is_untitled_file:
-            suggested_dir = QStandardPaths.writableLocation(QStandardPaths.DocumentsLocation)
-            suggested_filename_base = "Untitled.py"
-            if not is_untitled_file and current_path_placeholder:
-                suggested_dir = os.path.dirname(current_path_placeholder)
-                suggested_filename_base = os.path.basename(current_path_placeholder)
-            elif is_untitled_file and current_path_placeholder: # Untitled file, use its "Untitled-N" name
-                 suggested_filename_base = os.path.basename(current_path_placeholder)
-
-
-            full_suggested_path = os.path.join(suggested_dir, suggested_filename_base)
-
-            new_path_tuple = QFileDialog.getSaveFileName(
-                self, "Save File As", full_suggested_path,
-                "All Files (*);;Python Files (*.py);;C++ Files (*.cpp *.cxx *.h *.hpp);;Text Files (*.txt)"
-            )
-            new_path = new_path_tuple[0]
-
-            if not new_path:
-                self.status_bar.showMessage("Save operation cancelled.", 3000)
-                return False
-            path_to_save = new_path
-        else:
-            path_to_save = current_path_placeholder
-
-        if not path_to_save:
-             QMessageBox.critical(self, "Save Error", "No file path determined for saving.")
-             return False
-
-        if path_to_save.lower().endswith(".py"):
-            try:
-                formatted_content = black.format_str(content_to_save, mode=black.FileMode())
-                if formatted_content != content_to_save:
-                    self.is_updating_from_network = True
-                    current_cursor_pos = editor.textCursor().position()
-                    editor.setPlainText(formatted_content)
-                    new_cursor = editor.textCursor()
-                    new_cursor.setPosition(min(current_cursor_pos, len(formatted_content)))
-                    editor.setTextCursor(new_cursor)
-                    self.is_updating_from_network = False
-                    content_to_save = formatted_content
-            except black.parsing.LibCSTError as e:
-                QMessageBox.critical(self, "Formatting Error", f"Syntax error in Python code. Cannot format and save:\n{e}")
-                return False
-            except Exception as e:
-                print(f"Warning: Black formatting failed (non-syntax error), saving unformatted: {e}")
-        
-        QApplication.setOverrideCursor(Qt.WaitCursor)
-        self.file_manager.save_file(editor, content_to_save, path_to_save)
-        QApplication.restoreOverrideCursor()
-        return True
-
     @Slot(object, str, str) # widget_ref (editor), saved_path, saved_content
     def _handle_file_saved(self, editor_widget, saved_path, saved_content):
         if editor_widget not in self.editor_to_path:
-            print(f"Warning: _handle_file_saved received widget_ref not in editor_to_path map.")
-            # This could happen if a new untitled file was saved.
-            # Or if the editor_widget reference passed by FileManager isn't the one we have.
-            # Assuming editor_widget is the correct CodeEditor instance passed to save_file.
+            # The tab was closed (changes discarded) while the write was still running
+            if saved_path not in self.path_to_editor:
+                self.file_manager.file_closed_in_editor(saved_path)
+            return
 
         old_path = self.editor_to_path.get(editor_widget)
 
@@ -1246,6 +1237,7 @@ class MainWindow(QMainWindow):
             # File was saved under a new name (Save As) or untitled file saved first time
             if old_path in self.path_to_editor:
                 del self.path_to_editor[old_path]
+            self._release_untitled_name(old_path)
         
         self.editor_to_path[editor_widget] = saved_path
         self.path_to_editor[saved_path] = editor_widget
@@ -1254,17 +1246,22 @@ class MainWindow(QMainWindow):
             editor_widget.file_path = saved_path
 
 
+        saved_name = os.path.basename(saved_path)
         tab_index = self.tab_widget.indexOf(editor_widget)
         if tab_index != -1:
-            self.tab_widget.setTabText(tab_index, os.path.basename(saved_path))
+            self.tab_widget.setTabText(tab_index, saved_name)
             self.tab_widget.setTabToolTip(tab_index, saved_path)
             # The dirty status update (removing '*') is handled by _handle_dirty_status_changed
             # which is triggered by FileManager's dirty_status_changed signal.
 
-        # Content in editor should already be what was saved, as formatting happens in _save_file before calling fm.save_file.
-        # If black formatting changed content, editor was updated then.
+        # Black's edits are applied to the editor before fm.save_file is called, but
+        # the write itself runs in the background and the user may have typed since.
+        if isinstance(editor_widget, CodeEditor):
+            current_content = editor_widget.toPlainText()
+            if current_content != saved_content:
+                self.file_manager.update_file_content_changed(saved_path, current_content)
 
-        self.status_bar.showMessage(f"File '{os.path.basename(saved_path)}' saved successfully.", 3000)
+        self.status_bar.showMessage(f"File '{saved_name}' saved successfully.", 3000)
         if hasattr(self, 'file_explorer') and self.file_explorer:
              self.file_explorer.refresh_tree() # Refresh file explorer to show new file or rename
 
@@ -1285,39 +1282,141 @@ class MainWindow(QMainWindow):
             return
 
         if path.lower().endswith(".py"):
-            QApplication.setOverrideCursor(Qt.WaitCursor)
+            if current_editor in self._black_workers:
+                self.status_bar.showMessage("Formatting already in progress...")
+                return
             self.status_bar.showMessage("Formatting code...")
-            original_text = current_editor.toPlainText()
+            self._format_with_black(current_editor, path, save=False)
+        else:
+            self.status_bar.showMessage("Formatting is only supported for Python files (.py).")
+
+    def _format_with_black(self, editor: CodeEditor, path: str, save: bool, blocking: bool = False) -> bool:
+        """
+        Formats editor's text with BlackFormatterWorker on LANGUAGE_POOL, keeping the UI
+        responsive; _on_black_formatted applies the result and, if save is set, writes path.
+        With blocking, the worker runs right here instead and the save outcome is returned,
+        for callers such as closing a tab that must know it before going on.
+        """
+        code_text = editor.toPlainText()
+        if self._formatted_hashes.get(editor) == hash(code_text): # Already formatted, unchanged since
+            return self._on_black_formatted(editor, path, code_text, save, [], blocking)
+        worker = BlackFormatterWorker(code_text, path, self.tab_widget.indexOf(editor))
+        if blocking:
             try:
-                formatted_text = black.format_str(original_text, mode=black.FileMode())
-                if original_text != formatted_text:
-                    self.is_updating_from_network = True
-                    current_cursor_pos = current_editor.textCursor().position()
-                    current_editor.setPlainText(formatted_text)
-                    new_cursor = current_editor.textCursor()
-                    new_cursor.setPosition(min(current_cursor_pos, len(formatted_text)))
-                    current_editor.setTextCursor(new_cursor)
-                    self.is_updating_from_network = False
-                    self.file_manager.update_file_content_changed(path, formatted_text)
-                self.status_bar.showMessage("Code formatted.")
-            except black.parsing.LibCSTError as e:
-                self.status_bar.showMessage("Formatting failed: Syntax error.")
-                QMessageBox.critical(self, "Formatting Error", f"Syntax error in code. Cannot format:\n{e}")
+                edits = worker.format_edits()
+            except FormatSyntaxError as e:
+                return self._on_black_syntax_error(editor, save, str(e))
             except Exception as e:
-                self.status_bar.showMessage("Formatting failed.")
-                QMessageBox.critical(self, "Formatting Error", f"Failed to format code with Black:\n{e}")
-            finally:
-                QApplication.restoreOverrideCursor()
+                return self._on_black_error(editor, path, code_text, save, str(e), blocking=True)
+            return self._on_black_formatted(editor, path, code_text, save, edits, blocking=True)
+
+        self._black_workers[editor] = worker
+        generation = self._format_generations.get(editor, 0)
+        if save: # The status bar stands in for a wait cursor while black runs
+            self.status_bar.showMessage(f"Formatting {os.path.basename(path)} before saving...")
+        # Lambdas bind the editor and the text snapshot the result belongs to
+        worker.signals.finished.connect(
+            lambda edits, _path, _index: self._claim_black_result(editor, worker, generation)
+            and self._on_black_formatted(editor, path, code_text, save, edits))
+        worker.signals.syntax_error.connect(
+            lambda message, _path, _index: self._claim_black_result(editor, worker, generation)
+            and self._on_black_syntax_error(editor, save, message))
+        worker.signals.error.connect(
+            lambda message, _path, _index: self._claim_black_result(editor, worker, generation)
+            and self._on_black_error(editor, path, code_text, save, message))
+        # Connected last, so a save queued meanwhile starts after the result is handled
+        for signal in (worker.signals.finished, worker.signals.syntax_error, worker.signals.error):
+            signal.connect(lambda *_: self._start_queued_save(editor))
+        LANGUAGE_POOL.start(worker)
+        return True
+
+    def _claim_black_result(self, editor: CodeEditor, worker: BlackFormatterWorker, generation: int) -> bool:
+        """
+        Releases editor's background worker if it is this one.
+        False if a blocking save has superseded the result since the worker started.
+        """
+        if self._black_workers.get(editor) is worker:
+            del self._black_workers[editor]
+        return generation == self._format_generations.get(editor, 0)
+
+    def _start_queued_save(self, editor: CodeEditor):
+        if editor in self._black_workers: # Still formatting (e.g. re-run after an edit); keep waiting
+            return
+        path = self._queued_saves.pop(editor, None)
+        if path and editor in self.editor_to_path:
+            self._format_with_black(editor, path, save=True)
+
+    def _supersede_black_format(self, editor: CodeEditor):
+        """Drops editor's running background format and queued save; a blocking save replaces them."""
+        self._queued_saves.pop(editor, None)
+        if editor in self._black_workers:
+            self._format_generations[editor] = self._format_generations.get(editor, 0) + 1
+
+    def _on_black_formatted(self, editor: CodeEditor, path: str, code_text: str, save: bool, edits: list,
+                            blocking: bool = False) -> bool:
+        if editor not in self.editor_to_path: # Closed while formatting
+            return False
+        if editor.toPlainText() != code_text: # Edited while formatting; the edits no longer fit
+            return self._format_with_black(editor, path, save, blocking)
+        if edits:
+            self.is_updating_from_network = True
+            editor.apply_text_edits(edits) # Keeps the user's cursor, unlike setPlainText
+            self.is_updating_from_network = False
+            code_text = editor.toPlainText()
+        self._formatted_hashes[editor] = hash(code_text)
+        if save:
+            return self._write_file(editor, code_text, path, blocking)
         else:
-            self.status_bar.showMessage("Formatting is only supported for Python files (.py).")
+            if edits:
+                self.file_manager.update_file_content_changed(path, code_text)
+            self.status_bar.showMessage("Code formatted.")
+        return True
+
+    def _on_black_syntax_error(self, editor: CodeEditor, save: bool, message: str) -> bool:
+        if editor not in self.editor_to_path:
+            return False
+        if save:
+            self.status_bar.showMessage("Save failed: Syntax error.", 5000)
+            QMessageBox.critical(self, "Formatting Error", f"Syntax error in Python code. Cannot format and save:\n{message}")
+        else:
+            self.status_bar.showMessage("Formatting failed: Syntax error.")
+            QMessageBox.critical(self, "Formatting Error", f"Syntax error in code. Cannot format:\n{message}")
+        return False
+
+    def _on_black_error(self, editor: CodeEditor, path: str, code_text: str, save: bool, message: str,
+                        blocking: bool = False) -> bool:
+        if editor not in self.editor_to_path:
+            return False
+        if save:
+            print(f"Warning: Black formatting failed (non-syntax error), saving unformatted: {message}")
+            return self._write_file(editor, code_text, path, blocking)
+        self.status_bar.showMessage("Formatting failed.")
+        QMessageBox.critical(self, "Formatting Error", f"Failed to format code with Black:\n{message}")
+        return False
+
+    def _write_file(self, editor: CodeEditor, content: str, path: str, blocking: bool = False) -> bool:
+        """
+        Hands content to FileManager, which writes it on the global thread pool.
+        A blocking write happens right here and returns whether it succeeded.
+        """
+        if not blocking:
+            return self.file_manager.save_file(editor, content, path)
+        QApplication.setOverrideCursor(Qt.WaitCursor)
+        try:
+            return self.file_manager.save_file(editor, content, path, blocking=True)
+        finally:
+            QApplication.restoreOverrideCursor()
 
-    def _save_file(self, index: int, save_as: bool = False) -> bool:
+    def _save_file(self, index: int, save_as: bool = False, blocking: bool = False) -> bool:
+        """
+        Saves the editor at index, formatting Python files with black first. Formatting
+        runs in the background unless blocking is set, so the file is written a little later.
+        """
         editor = self.tab_widget.widget(index)
         if not isinstance(editor, CodeEditor):
             return False
 
         current_path_placeholder = self.editor_to_path.get(editor)
-        content_to_save = editor.toPlainText()
         path_to_save = None
 
         is_untitled_file = current_path_placeholder is not None and current_path_placeholder.startswith("untitled:")
@@ -1351,28 +1450,17 @@ class MainWindow(QMainWindow):
              QMessageBox.critical(self, "Save Error", "No file path determined for saving.")
              return False
 
+        if blocking: # Whatever is still formatting or queued in the background is replaced by this save
+            self._supersede_black_format(editor)
+
         if path_to_save.lower().endswith(".py"):
-            try:
-                formatted_content = black.format_str(content_to_save, mode=black.FileMode())
-                if formatted_content != content_to_save:
-                    self.is_updating_from_network = True
-                    current_cursor_pos = editor.textCursor().position()
-                    editor.setPlainText(formatted_content)
-                    new_cursor = editor.textCursor()
-                    new_cursor.setPosition(min(current_cursor_pos, len(formatted_content)))
-                    editor.setTextCursor(new_cursor)
-                    self.is_updating_from_network = False
-                    content_to_save = formatted_content
-            except black.parsing.LibCSTError as e:
-                QMessageBox.critical(self, "Formatting Error", f"Syntax error in Python code. Cannot format and save:\n{e}")
-                return False
-            except Exception as e:
-                print(f"Warning: Black formatting failed (non-syntax error), saving unformatted: {e}")
+            if not blocking and editor in self._black_workers:
+                self._queued_saves[editor] = path_to_save # Saved to this path once the running format is done
+                return True
+            return self._format_with_black(editor, path_to_save, save=True, blocking=blocking)
 
-        QApplication.setOverrideCursor(Qt.WaitCursor)
-        self.file_manager.save_file(editor, content_to_save, path_to_save)
-        QApplication.restoreOverrideCursor()
-        return True
+        # Python files snapshot the text in _format_with_black
+        return self._write_file(editor, editor.toPlainText(), path_to_save, blocking)
 
 
     def save_session(self):
@@ -1454,10 +1542,8 @@ class MainWindow(QMainWindow):
         # Use active_file_path_to_restore from session data
         if active_file_path_to_restore and active_file_path_to_restore in self.path_to_editor:
             editor_to_activate = self.path_to_editor[active_file_path_to_restore]
-            for i in range(self.tab_widget.count()):
-                if self.tab_widget.widget(i) == editor_to_activate:
-                    self.tab_widget.setCurrentIndex(i)
-                    break
+            if self.tab_widget.indexOf(editor_to_activate) != -1:
+                self.tab_widget.setCurrentWidget(editor_to_activate)
         elif self.tab_widget.count() > 0: # Default to first tab if active one not found or not specified
             self.tab_widget.setCurrentIndex(0)
 
@@ -1592,7 +1678,7 @@ class MainWindow(QMainWindow):
                     idx = self.tab_widget.indexOf(editor_widget)
                     if idx != -1:
                         # self.tab_widget.setCurrentIndex(idx) # Ensure tab is current for _save_file context
-                        if not self._save_file(idx): # Attempt to save
+                        if not self._save_file(idx, blocking=True): # Attempt to save
                             all_saved_successfully = False
                             # If a save is cancelled by user, _save_file returns False.
                             # We should then ignore the close event.
@@ -1609,6 +1695,7 @@ class MainWindow(QMainWindow):
         
         # If all checks pass (no dirty files, or user chose Discard, or all saves succeeded):
         self.save_session() # Save session state (open files list, etc.)
+        self.session_manager.flush(blocking=True) # Write it now; the debounced save would never fire
         event.accept() # Allow window to close
 
     @Slot(QPoint)
@@ -1633,11 +1720,11 @@ class MainWindow(QMainWindow):
 
     def _find_editor_for_path(self, file_path):
         """Helper to find an open CodeEditor tab for a given file path."""
-        for i in range(self.tab_widget.count()):
-            editor = self.tab_widget.widget(i)
-            if isinstance(editor, CodeEditor) and editor.file_path == file_path:
-                return editor, i
-        return None, -1
+        editor = self.path_to_editor.get(file_path)
+        index = self.tab_widget.indexOf(editor) if isinstance(editor, CodeEditor) else -1
+        if index == -1:
+            return None, -1
+        return editor, index
 
     def _rename_file_folder(self, index):
         model = self.file_explorer.model
@@ -1695,6 +1782,11 @@ class MainWindow(QMainWindow):
         else:
             print(f"Process Output (no terminal_widget): {output_str}")
 
+    @Slot(QByteArray, str)
+    def _on_debugger_child_output(self, data, stream):
+        # The debugged script's stdout/stderr goes to the same terminal as a plain run
+        self._handle_process_output(data.data().decode(errors='replace'))
+
     @Slot()
     def _handle_process_started(self):
         self.status_bar.showMessage("Process started...")
@@ -1825,7 +1917,7 @@ class MainWindow(QMainWindow):
             QMessageBox.warning(self, "Debug", "Please save the file before debugging.")
             return
 
-        if not self.save_current_file(): # Ensure latest version is saved
+        if not self.save_current_file(blocking=True): # Ensure latest version is on disk before debugpy reads it
             QMessageBox.warning(self, "Debug", "Save operation cancelled or failed. Debug aborted.")
             return
 
@@ -1871,8 +1963,8 @@ class MainWindow(QMainWindow):
             if isinstance(editor, CodeEditor): # Ensure it's a CodeEditor instance
                 editor.set_exec_highlight(None)
 
-    @Slot(int, str, list, list)
-    def _on_debugger_paused(self, thread_id: int, reason: str, call_stack: list, variables: list):
+    @Slot(int, str, list, object)
+    def _on_debugger_paused(self, thread_id: int, reason: str, call_stack: list, variables: VariablesView):
         print(f"MainWindow: Debugger paused. Thread: {thread_id}, Reason: {reason}")
 
         self.call_stack_panel.clear()
@@ -1892,12 +1984,13 @@ class MainWindow(QMainWindow):
             placeholder_item = QTreeWidgetItem(self.variables_panel, ["No variables in current scope."])
             self.variables_panel.addTopLevelItem(placeholder_item)
         else:
-            for var in variables:
-                # Format: {'name': var_name, 'type': var_type, 'value': var_value, 'variablesReference': ref_id}
-                var_item = QTreeWidgetItem([var['name'], var['value'], var['type']])
-                # TODO: Handle expandable variables using var['variablesReference'] > 0 in a future step
-                self.variables_panel.addTopLevelItem(var_item)
-        self.variables_panel.expandAll() # Optional: expand all variable items
+            self.variables_panel.addTopLevelItems(self._make_variable_items(variables))
+        # Remaining scopes (e.g. Globals) are only fetched from the debugger when expanded.
+        # No expandAll() here, as that would fetch every one of them straight away.
+        for scope_name in self.debug_manager.deferred_scope_names():
+            scope_item = QTreeWidgetItem([scope_name])
+            scope_item.setChildIndicatorPolicy(QTreeWidgetItem.ShowIndicator)
+            self.variables_panel.addTopLevelItem(scope_item)
 
         # Highlight current execution line
         active_editor = self._get_current_code_editor()
@@ -1932,6 +2025,53 @@ class MainWindow(QMainWindow):
                     break
 
 
+    def _make_variable_items(self, variables: VariablesView) -> list:
+        items = []
+        for name, value, var_type, ref in zip(variables.names, variables.values, variables.types, variables.refs):
+            var_item = QTreeWidgetItem([name, value, var_type])
+            if ref > 0: # Expandable; children are fetched when expanded
+                var_item.setData(0, Qt.UserRole, ref)
+                var_item.setChildIndicatorPolicy(QTreeWidgetItem.ShowIndicator)
+            items.append(var_item)
+        return items
+
+    def _fill_variables_item(self, item: QTreeWidgetItem, variables: VariablesView):
+        item.takeChildren() # Drop the "Loading..." placeholder
+        item.setChildIndicatorPolicy(QTreeWidgetItem.DontShowIndicatorWhenChildless)
+        item.addChildren(self._make_variable_items(variables))
+
+    @Slot(QTreeWidgetItem)
+    def _on_variables_item_expanded(self, item):
+        # Deferred scope or expandable variable opened for the first time: fetch its children
+        if item.childCount() != 0 or item.childIndicatorPolicy() != QTreeWidgetItem.ShowIndicator:
+            return
+        item.addChild(QTreeWidgetItem(["Loading..."]))
+        variables_reference = item.data(0, Qt.UserRole)
+        if variables_reference:
+            self.debug_manager.expand_variable(variables_reference)
+        elif item.parent() is None:
+            self.debug_manager.fetch_scope_variables(item.text(0))
+
+    @Slot(str, object)
+    def _on_scope_variables_loaded(self, scope_name: str, variables: VariablesView):
+        for scope_item in self.variables_panel.findItems(scope_name, Qt.MatchExactly, 0):
+            if scope_item.data(0, Qt.UserRole) or scope_item.childIndicatorPolicy() != QTreeWidgetItem.ShowIndicator:
+                continue # A variable that happens to share the scope's name
+            self._fill_variables_item(scope_item, variables)
+
+    @Slot(int, object)
+    def _on_variable_children_loaded(self, variables_reference: int, variables: VariablesView):
+        pending_items = [] # Collected first; filling them while iterating would invalidate the iterator
+        iterator = QTreeWidgetItemIterator(self.variables_panel)
+        while iterator.value():
+            item = iterator.value()
+            if item.data(0, Qt.UserRole) == variables_reference and \
+               item.childIndicatorPolicy() == QTreeWidgetItem.ShowIndicator and item.childCount() == 1:
+                pending_items.append(item) # Only items still showing "Loading..."
+            iterator += 1
+        for item in pending_items:
+            self._fill_variables_item(item, variables)
+
     @Slot()
     def _on_debugger_resumed(self):
         print("MainWindow: Debugger resumed.")
@@ -1,8 +1,49 @@
 import os
 import json
-from PySide6.QtCore import QObject, Slot, QStandardPaths, Signal
+from PySide6.QtCore import QObject, Slot, QStandardPaths, Signal, QTimer, QThreadPool
+from worker_threads import SaveSessionWorker
+
+try:
+    import orjson # Optional: parses/serializes in C, much faster than the stdlib json module
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack # Optional: compact binary session file, smaller and faster to parse than JSON
+except ImportError:
+    msgpack = None
+
+
+def _json_loads(raw: bytes):
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+def _json_dumps(data) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2)
+    return json.dumps(data, indent=4).encode('utf-8')
+
+
+def _msgpack_loads(raw: bytes):
+    return msgpack.unpackb(raw, raw=False)
+
+
+_config_dir = None # AppConfigLocation, looked up once per process
+
+
+def _get_config_dir() -> str:
+    # Resolved on first use rather than at import: the location depends on the
+    # application name, which is only known once the QApplication exists.
+    global _config_dir
+    if _config_dir is None:
+        _config_dir = QStandardPaths.writableLocation(QStandardPaths.AppConfigLocation)
+    return _config_dir
 
 class SessionManager(QObject):
+    SAVE_DELAY_MS = 500 # Quiet period before a scheduled session save is written
+
     # Signal to inform about errors during session loading or saving
     session_error = Signal(str)
     session_loaded = Signal(dict) # Emits loaded session data
@@ -11,54 +52,100 @@ class SessionManager(QObject):
     def __init__(self, parent=None):
         super().__init__(parent)
         self.session_file_name = "session.json"
+        self.binary_session_file_name = "session.msgpack" # Used instead of session.json when msgpack is installed
         self.app_config_dir_name = ".aether_editor" # Same as in MainWindow
+        self._session_file_path = self._compute_session_file_path() # Directory is created once, here
+        self._binary_session_file_path = os.path.join(os.path.dirname(self._session_file_path),
+                                                      self.binary_session_file_name)
 
-    def _get_session_file_path(self):
-        config_dir = QStandardPaths.writableLocation(QStandardPaths.AppConfigLocation)
-        session_dir = os.path.join(config_dir, self.app_config_dir_name)
+        # Bursts of save_session calls are coalesced: only the latest snapshot is
+        # written, once the session has been quiet for SAVE_DELAY_MS.
+        self._pending_snapshot = None
+        self._flush_timer = QTimer(self)
+        self._flush_timer.setSingleShot(True)
+        self._flush_timer.timeout.connect(self.flush)
+        self._save_generation = 0 # Bumped per write so a stale background save never wins
+
+    def _compute_session_file_path(self):
+        session_dir = os.path.join(_get_config_dir(), self.app_config_dir_name)
         os.makedirs(session_dir, exist_ok=True)
         return os.path.join(session_dir, self.session_file_name)
 
+    def _get_session_file_path(self):
+        return self._session_file_path
+
     @Slot(dict, list, str, str)
     def save_session(self, open_files_data, recent_projects, root_path, active_file_path: str):
         """
-        Saves the session data to session.json.
+        Schedules the session data to be saved to session.json.
+        The write happens SAVE_DELAY_MS after the last call; call flush() to write immediately.
         open_files_data: Data from FileManager.get_all_open_files_data()
                          It's a dict like {path: {"is_dirty": bool, "content_hash": int}}
         recent_projects: List of recent project paths.
         root_path: Current root path of the file explorer.
         active_file_path: Path of the currently active file/tab.
         """
-        session_data_to_save = {
+        self._pending_snapshot = {
             "open_files_data": open_files_data, # This now stores hashes and dirty flags
-            "recent_projects": recent_projects,
+            "recent_projects": list(recent_projects), # Copy, the caller keeps mutating its list
             "root_path": root_path,
             "active_file_path": active_file_path
         }
+        self._flush_timer.start(self.SAVE_DELAY_MS) # Restarts the countdown if already pending
+
+    @Slot()
+    def flush(self, blocking: bool = False):
+        """
+        Writes the pending session snapshot, if any, to the session file right away.
+        The file is written on the global QThreadPool; pass blocking=True to
+        write it on the calling thread instead (e.g. during shutdown).
+        """
+        self._flush_timer.stop()
+        session_data_to_save, self._pending_snapshot = self._pending_snapshot, None
+        if session_data_to_save is None:
+            return
 
-        session_file_path = self._get_session_file_path()
         try:
-            with open(session_file_path, 'w', encoding='utf-8') as f:
-                json.dump(session_data_to_save, f, indent=4)
-            # print(f"SessionManager: Session saved to {session_file_path}. Content: {session_data_to_save}")
-            self.session_saved.emit()
-        except IOError as e:
-            error_msg = f"Error saving session to {session_file_path}: {e}"
-            # print(f"SessionManager: {error_msg}")
-            self.session_error.emit(error_msg)
+            # Serialize here (cheap), write off the UI thread
+            if msgpack is not None:
+                session_file_path = self._binary_session_file_path
+                payload = msgpack.packb(session_data_to_save, use_bin_type=True)
+            else:
+                session_file_path = self._get_session_file_path()
+                payload = _json_dumps(session_data_to_save)
         except Exception as e:
             error_msg = f"An unexpected error occurred while saving session: {e}"
             # print(f"SessionManager: {error_msg}")
             self.session_error.emit(error_msg)
+            return
+
+        self._save_generation += 1
+        if blocking:
+            try:
+                SaveSessionWorker.write(payload, session_file_path, self._save_generation)
+            except OSError as e:
+                self.session_error.emit(f"Error saving session to {session_file_path}: {e}")
+                return
+            self.session_saved.emit()
+            return
+
+        worker = SaveSessionWorker(payload, session_file_path, self._save_generation)
+        worker.signals.finished.connect(self.session_saved)
+        worker.signals.error.connect(self.session_error)
+        QThreadPool.globalInstance().start(worker)
 
     @Slot()
     def load_session(self):
         """
-        Loads session data from session.json.
+        Loads session data from session.msgpack, or from session.json if there is
+        no binary session yet (older versions, or msgpack not installed).
         Returns the loaded data as a dictionary.
         Emits session_loaded signal on success, or session_error on failure.
         """
-        session_file_path = self._get_session_file_path()
+        if msgpack is not None and os.path.exists(self._binary_session_file_path):
+            session_file_path, loads = self._binary_session_file_path, _msgpack_loads
+        else:
+            session_file_path, loads = self._get_session_file_path(), _json_loads # Migrated on next save
         default_session_data = {
             "open_files_data": {},
             "recent_projects": [],
@@ -68,8 +155,9 @@ class SessionManager(QObject):
 
         if os.path.exists(session_file_path):
             try:
-                with open(session_file_path, 'r', encoding='utf-8') as f:
-                    loaded_data = json.load(f)
+                # Parse the raw bytes directly; the parsers validate UTF-8 themselves
+                with open(session_file_path, 'rb') as f:
+                    loaded_data = loads(f.read())
 
                 # Ensure active_file_path is part of the loaded_data, default to None if not.
                 # If old "active_file_index" exists, it's ignored in favor of "active_file_path".
@@ -1,18 +1,176 @@
-from PySide6.QtCore import QRunnable, QObject, Signal
-import black
+from PySide6.QtCore import QRunnable, QObject, Signal, QMutex, QMutexLocker, QThread, QThreadPool
 import traceback
+import os
+import ast
+import json
+import itertools
+import hashlib
+import difflib
+import shutil
+import subprocess
+import sys
+import threading
+from collections import OrderedDict
+from pyflakes import checker as _pyflakes_checker
+from pyflakes import messages as _pyflakes_messages
+
+_DEBUG = bool(os.environ.get("AETHER_DEBUG")) # Include full tracebacks in worker error messages
+
+# Dedicated pool for the language workers below (completion, linting, formatting).
+# It leaves a few cores free so bursts of editor work never starve the UI thread
+# or the global pool used for file I/O.
+LANGUAGE_POOL = QThreadPool()
+LANGUAGE_POOL.setMaxThreadCount(max(2, QThread.idealThreadCount() - 3))
+
+# black takes a good fraction of a second to import, so it is loaded on the first
+# format rather than at startup; sessions that never format never pay for it.
+_black = None
+_BLACK_MODE = None # Default black settings, built once and shared by every format
+
+
+class FormatSyntaxError(Exception):
+    """Raised by BlackFormatterWorker.format_edits when black cannot parse the code."""
+
+
+def _get_black():
+    """Imports black on first use and returns the module."""
+    global _black, _BLACK_MODE
+    if _black is None:
+        import black
+        _BLACK_MODE = black.FileMode()
+        _black = black
+    return _black
+
+# Recently formatted buffers, keyed by a digest of the input text. Repeated
+# format-on-save of an unchanged buffer skips black entirely.
+_FORMAT_CACHE_SIZE = 64
+_format_cache: OrderedDict[bytes, str] = OrderedDict()
+_format_cache_lock = threading.Lock() # Workers run concurrently on the QThreadPool
+
+
+def _format_code(code_text: str) -> str:
+    """
+    Returns code_text formatted by black, reusing a cached result when the same
+    text was formatted recently.
+    """
+    digest = hashlib.blake2b(code_text.encode('utf-8'), digest_size=16).digest()
+    with _format_cache_lock:
+        formatted = _format_cache.get(digest)
+        if formatted is not None:
+            _format_cache.move_to_end(digest)
+            return formatted
+
+    black = _get_black()
+    try:
+        formatted = black.format_str(code_text, mode=_BLACK_MODE) # Format outside the lock
+    except black.InvalidInput as e:
+        raise FormatSyntaxError(str(e)) from e
+
+    with _format_cache_lock:
+        _format_cache[digest] = formatted
+        _format_cache.move_to_end(digest)
+        if len(_format_cache) > _FORMAT_CACHE_SIZE:
+            _format_cache.popitem(last=False)
+    return formatted
+
+def _utf16_len(text: str) -> int:
+    """Length of text in UTF-16 code units, the unit QTextDocument positions count in."""
+    return len(text) if text.isascii() else len(text.encode('utf-16-le')) // 2
+
+
+def _compute_text_edits(old_text: str, new_text: str) -> list:
+    """
+    Returns the (start, end, replacement) edits that turn old_text into new_text.
+    The diff is line based; start/end are document positions in old_text, in
+    ascending order, so they must be applied from last to first.
+    """
+    if old_text == new_text:
+        return []
+    old_lines = old_text.splitlines(keepends=True)
+    new_lines = new_text.splitlines(keepends=True)
+    offsets = list(itertools.accumulate(map(_utf16_len, old_lines), initial=0))
+    matcher = difflib.SequenceMatcher(None, old_lines, new_lines, autojunk=False)
+    return [(offsets[i1], offsets[i2], ''.join(new_lines[j1:j2]))
+            for tag, i1, i2, j1, j2 in matcher.get_opcodes() if tag != 'equal']
+
+# Message prefixes for the pyflakes warnings called out by name; others get "Pyflakes"
+_PYFLAKES_PREFIXES = {
+    _pyflakes_messages.UnusedImport: "Unused import",
+    _pyflakes_messages.UndefinedName: "Undefined name",
+}
+
+# Optional: when ruff is installed, its pyflakes rules (F*) are used instead of
+# pyflakes itself, which is several times faster on large files.
+_RUFF_PATH = shutil.which("ruff")
+# Keep Windows from flashing a console window for every ruff run
+_RUFF_CREATION_FLAGS = subprocess.CREATE_NO_WINDOW if sys.platform.startswith('win') else 0
+_RUFF_PREFIXES = {"F401": "Unused import", "F821": "Undefined name"}
+
+
+def _lint_with_ruff(code_text: str) -> list | None:
+    """
+    Lints code_text with ruff's pyflakes rules and returns (line, column, message) tuples.
+    Returns None if ruff fails in any way, so the caller can fall back to pyflakes.
+    """
+    try:
+        proc = subprocess.run(
+            [_RUFF_PATH, "check", "--isolated", "--exit-zero", "--select", "F",
+             "--output-format", "json", "--stdin-filename", "temp_file.py", "-"],
+            input=code_text.encode('utf-8'), capture_output=True, timeout=10,
+            creationflags=_RUFF_CREATION_FLAGS
+        )
+        if proc.returncode != 0: # --exit-zero: anything else is a ruff failure
+            return None
+        problems = []
+        for diagnostic in json.loads(proc.stdout or b"[]"):
+            code = diagnostic.get("code")
+            location = diagnostic["location"]
+            if not code or code == "invalid-syntax": # Older ruff releases report syntax errors with no code
+                prefix = "Syntax error"
+            else:
+                prefix = _RUFF_PREFIXES.get(code, "Pyflakes")
+            problems.append((location["row"], location["column"] - 1, f"{prefix}: {diagnostic['message']}"))
+        return problems
+    except (OSError, subprocess.SubprocessError, ValueError, KeyError, TypeError):
+        return None # Not runnable, timed out, or output we cannot read
+
+# Jedi's interpreter environment and per-directory projects are expensive to
+# discover, so they are resolved once and shared by every completion request.
+_jedi_lock = threading.Lock()
+_jedi_complete_lock = threading.Lock() # Jedi's inference state is not thread-safe; one completion at a time
+_jedi_environment = None
+_jedi_projects = {} # directory -> jedi.Project
+
+
+def _get_jedi_context(path: str):
+    """
+    Returns the shared (environment, project) pair for completing in path.
+    """
+    global _jedi_environment
+    import jedi
+    directory = os.path.dirname(os.path.abspath(path))
+    with _jedi_lock:
+        if _jedi_environment is None:
+            _jedi_environment = jedi.get_default_environment()
+        project = _jedi_projects.get(directory)
+        if project is None:
+            project = _jedi_projects[directory] = jedi.get_default_project(directory)
+    return _jedi_environment, project
 
 class BlackFormatterSignals(QObject):
     """
     Defines the signals available from a running BlackFormatterWorker.
     """
-    finished = Signal(str, str, int) # formatted_text, file_path, editor_index
+    finished = Signal(list, str, int) # edits (see _compute_text_edits), file_path, editor_index
     error = Signal(str, str, int)    # error_message, file_path, editor_index
+    syntax_error = Signal(str, str, int) # black's parse error, file_path, editor_index
 
 class BlackFormatterWorker(QRunnable):
     """
     Worker for running Black code formatting in a separate thread.
     """
+    __slots__ = ("code_text", "file_path", "editor_index", "signals")
+
     def __init__(self, code_text: str, file_path: str, editor_index: int):
         super().__init__()
         self.code_text = code_text
@@ -20,51 +178,201 @@ class BlackFormatterWorker(QRunnable):
         self.editor_index = editor_index
         self.signals = BlackFormatterSignals()
 
+    def format_edits(self) -> list:
+        """
+        Formats the code and returns the edits turning it into black's output.
+        Raises FormatSyntaxError if the code cannot be parsed.
+        """
+        # Use black.format_str for formatting a string (cached per input text)
+        formatted_code = _format_code(self.code_text)
+        # Only the changed lines cross back to the GUI thread, so applying the
+        # result costs in proportion to what black changed, not to file size.
+        return _compute_text_edits(self.code_text, formatted_code)
+
     def run(self):
         """
         Formats the code using black and emits signals based on success or failure.
         """
         try:
-            # Use black.format_str for formatting a string
-            # mode=black.FileMode() uses default black settings
-            formatted_code = black.format_str(self.code_text, mode=black.FileMode())
-            self.signals.finished.emit(formatted_code, self.file_path, self.editor_index)
-        except black.parsing.LibCSTError as e:
+            edits = self.format_edits()
+            self.signals.finished.emit(edits, self.file_path, self.editor_index)
+        except FormatSyntaxError as e:
             # Specific error for syntax issues that black can't parse
-            error_message = f"Black formatting failed due to syntax error: {e}"
-            self.signals.error.emit(error_message, self.file_path, self.editor_index)
+            self.signals.syntax_error.emit(str(e), self.file_path, self.editor_index)
         except Exception as e:
             # Catch any other unexpected errors during formatting
-            error_message = f"An unexpected error occurred during formatting: {e}\n{traceback.format_exc()}"
+            error_message = f"An unexpected error occurred during formatting: {e}"
+            if _DEBUG: # Formatting black's deep stack is costly; only do it when asked to
+                error_message += f"\n{traceback.format_exc()}"
             self.signals.error.emit(error_message, self.file_path, self.editor_index)
 
+class SaveSessionSignals(QObject):
+    """
+    Defines the signals available from a running SaveSessionWorker.
+    """
+    finished = Signal()
+    error = Signal(str) # error_message
+
+class SaveSessionWorker(QRunnable):
+    """
+    Worker for writing an already serialized session file in a separate thread.
+    """
+    __slots__ = ("payload", "file_path", "generation", "signals")
+    _write_mutex = QMutex() # Only one session write touches the disk at a time
+    _written_generation = 0 # Generation of the newest payload written so far
+
+    def __init__(self, payload: bytes, file_path: str, generation: int):
+        super().__init__()
+        self.payload = payload
+        self.file_path = file_path
+        self.generation = generation # Increases with every save; older payloads are dropped
+        self.signals = SaveSessionSignals()
+
+    @classmethod
+    def write(cls, payload: bytes, file_path: str, generation: int):
+        """
+        Atomically replaces file_path with payload, unless a newer generation
+        has already been written. Raises OSError on failure.
+        """
+        with QMutexLocker(cls._write_mutex):
+            if generation <= cls._written_generation:
+                return # Superseded by a newer save while queued
+            # Write next to the real file and rename over it, so a crash mid-save
+            # leaves the previous session intact instead of a truncated one.
+            tmp_path = file_path + '.tmp'
+            try:
+                with open(tmp_path, 'wb') as f:
+                    f.write(payload)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, file_path)
+            except BaseException:
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+                raise
+            cls._written_generation = generation
+
+    def run(self):
+        try:
+            self.write(self.payload, self.file_path, self.generation)
+            self.signals.finished.emit()
+        except OSError as e:
+            self.signals.error.emit(f"Error saving session to {self.file_path}: {e}")
+
+class SaveFileSignals(QObject):
+    """
+    Defines the signals available from a running SaveFileWorker.
+    """
+    finished = Signal(object, str, str) # widget_ref, file_path, content
+    error = Signal(object, str, str)    # widget_ref, file_path, error_message
+
+class SaveFileWorker(QRunnable):
+    """
+    Worker for writing an editor's text to disk in a separate thread.
+    Saves of the same path are numbered, so a slow older write never lands
+    after a newer one.
+    """
+    __slots__ = ("widget_ref", "content", "file_path", "generation", "signals")
+    _generations = itertools.count(1)
+    _write_mutex = QMutex() # One file write touches the disk at a time
+    _written_generations = {} # file_path -> generation of the newest content written
+
+    def __init__(self, widget_ref, content: str, file_path: str):
+        super().__init__()
+        self.widget_ref = widget_ref
+        self.content = content
+        self.file_path = file_path
+        self.generation = self.next_generation()
+        self.signals = SaveFileSignals()
+
+    @classmethod
+    def next_generation(cls) -> int:
+        return next(cls._generations)
+
+    @classmethod
+    def write(cls, content: str, file_path: str, generation: int) -> bool:
+        """
+        Writes content to file_path, unless a newer save of the same path has
+        already been written. Returns whether it wrote; raises OSError on failure.
+        """
+        with QMutexLocker(cls._write_mutex):
+            if generation <= cls._written_generations.get(file_path, 0):
+                return False # Superseded by a newer save while queued
+            dir_name = os.path.dirname(file_path)
+            if dir_name: # Ensure directory exists only if path includes a directory
+                os.makedirs(dir_name, exist_ok=True)
+            with open(file_path, 'w', encoding='utf-8') as f:
+                f.write(content)
+            cls._written_generations[file_path] = generation
+            return True
+
+    def run(self):
+        try:
+            if self.write(self.content, self.file_path, self.generation):
+                self.signals.finished.emit(self.widget_ref, self.file_path, self.content)
+        except Exception as e:
+            self.signals.error.emit(self.widget_ref, self.file_path, f"Could not save file {self.file_path}: {e}")
+
+class RequestCounter:
+    """
+    Numbers one editor's requests of one kind (completions or linting).
+    Each editor owns its own counter, so a new request only supersedes that
+    editor's earlier ones and never another editor's.
+    """
+    __slots__ = ("latest",)
+
+    def __init__(self):
+        self.latest = 0
+
+    def next(self) -> int:
+        self.latest += 1
+        return self.latest
+
 class WorkerSignals(QObject):
     """
     Defines the signals available from a running worker thread.
     """
-    result = Signal(object)
+    result = Signal(int, object) # generation, result; the receiver drops superseded generations
     error = Signal(str)
     finished = Signal()
 
 class JediCompletionWorker(QRunnable):
     """
     Worker for running Jedi completions in a separate thread.
+    Only the newest worker of the editor's RequestCounter does any work; older ones are stale.
     """
-    def __init__(self, code_text, line, column, filename):
+    __slots__ = ("code_text", "line", "column", "filename", "signals", "requests", "generation")
+
+    def __init__(self, code_text, line, column, filename, requests: RequestCounter):
         super().__init__()
         self.code_text = code_text
         self.line = line
         self.column = column
         self.filename = filename
         self.signals = WorkerSignals()
+        self.requests = requests
+        self.generation = requests.next()
+
+    def is_stale(self) -> bool:
+        """True once the same editor has made a newer completion request."""
+        return self.generation != self.requests.latest
 
     def run(self):
         try:
+            if self.is_stale(): # The user kept typing; a newer request will answer
+                return
             import jedi
-            environment = jedi.get_default_environment()
-            script = jedi.Script(self.code_text, self.line, self.column, self.filename, environment=environment)
-            completions = script.complete()
-            self.signals.result.emit([c.name for c in completions])
+            environment, project = _get_jedi_context(self.filename)
+            with _jedi_complete_lock:
+                if self.is_stale(): # Superseded while waiting for another editor's completion
+                    return
+                # Passing path= lets parso reuse its cached parse of this file between requests
+                script = jedi.Script(code=self.code_text, path=self.filename, project=project, environment=environment)
+                completions = script.complete(self.line, self.column)
+            if not self.is_stale():
+                self.signals.result.emit(self.generation, [c.name for c in completions])
         except Exception as e:
             self.signals.error.emit(f"Jedi completion error: {e}")
         finally:
@@ -73,44 +381,48 @@ class JediCompletionWorker(QRunnable):
 class PyflakesLinterWorker(QRunnable):
     """
     Worker for running Pyflakes linting in a separate thread.
+    Only the newest worker of the editor's RequestCounter does any work; older ones are stale.
     """
-    def __init__(self, code_text):
+    __slots__ = ("code_text", "signals", "requests", "generation")
+
+    def __init__(self, code_text, requests: RequestCounter):
         super().__init__()
         self.code_text = code_text
         self.signals = WorkerSignals()
+        self.requests = requests
+        self.generation = requests.next()
+
+    def is_stale(self) -> bool:
+        """True once the same editor has made a newer lint request."""
+        return self.generation != self.requests.latest
 
     def run(self):
         try:
-            from pyflakes import api
-            from pyflakes import messages as m
-            
-            # Redirect stderr to capture pyflakes output
-            original_stderr = sys.stderr
-            sys.stderr = StringIO()
-            
-            # Run pyflakes check
-            tree = api.parse(self.code_text)
-            warnings = api.check(tree, os.path.basename("temp_file.py")) # Use a dummy filename
-            
-            # Get output from StringIO
-            output = sys.stderr.getvalue()
-            sys.stderr = original_stderr # Restore stderr
-            
-            # Parse warnings/errors
-            problems = []
-            for warning in warnings:
-                if isinstance(warning, m.UnusedImport):
-                    problems.append(f"Unused import: {warning.message} at line {warning.lineno}")
-                elif isinstance(warning, m.UndefinedName):
-                    problems.append(f"Undefined name: {warning.message} at line {warning.lineno}")
-                else:
-                    problems.append(f"Pyflakes: {warning.message} at line {warning.lineno}")
-            
-            self.signals.result.emit(problems)
+            if self.is_stale(): # The buffer changed again; a newer request will lint it
+                return
+            # Prefer ruff when installed; any ruff failure falls through to pyflakes
+            problems = _lint_with_ruff(self.code_text) if _RUFF_PATH else None
+            if problems is not None:
+                if not self.is_stale():
+                    self.signals.result.emit(self.generation, problems)
+                return
+            # Run the checker on the parsed tree; it collects its findings in
+            # .messages, so nothing is printed and stderr never needs redirecting.
+            problems = [] # (line, column, message) tuples, as CodeEditor.apply_linting_highlights expects
+            try:
+                tree = ast.parse(self.code_text, filename="temp_file.py") # Use a dummy filename
+            except SyntaxError as e:
+                problems.append((e.lineno or 1, e.offset or 0, f"Syntax error: {e.msg}"))
+            else:
+                warnings = _pyflakes_checker.Checker(tree, filename="temp_file.py").messages
+                prefixes = _PYFLAKES_PREFIXES
+                for warning in warnings:
+                    prefix = prefixes.get(type(warning), "Pyflakes")
+                    problems.append((warning.lineno, warning.col, f"{prefix}: {warning.message % warning.message_args}"))
+
+            if not self.is_stale():
+                self.signals.result.emit(self.generation, problems)
         except Exception as e:
             self.signals.error.emit(f"Pyflakes linting error: {e}")
         finally:
             self.signals.finished.emit()
-
-import sys
-from io import StringIO
\ No newline at end of file